@@ -0,0 +1,172 @@
+"""
+Generates synthetic pages of vstup.info: admission lists of 2014 and 2017
+layouts and pages of universities, parsable by data_parser.
+
+python -m benchmarks.generator --path /tmp/pages --format 2017 \
+    --files 100 --rows 200 --univs 10
+"""
+import argparse
+import os
+import random
+
+LAST_NAMES = ['Шевченко', 'Коваленко', 'Бондаренко', 'Ткаченко', 'Кравченко',
+              'Олійник', 'Шевчук', 'Поліщук', 'Бойко', 'Мельник']
+FIRST_NAMES = ['Олександр', 'Марія', 'Андрій', 'Оксана', 'Дмитро', 'Ірина',
+               'Тарас', 'Наталія']
+MIDDLE_NAMES = ['Олександрович', 'Іванівна', 'Петрович', 'Миколаївна',
+                'Васильович', 'Андріївна']
+EXAMS = ['Українська мова та література', 'Математика', 'Історія України',
+         'Англійська мова', 'Біологія', 'Фізика', 'Хімія', 'Географія']
+# {knowledge area: courses}
+AREAS = {
+    'Право': ['081 Право', '293 Міжнародне право'],
+    'Інформаційні технології': ['121 Інженерія програмного забезпечення',
+                                '122 Комп\'ютерні науки'],
+    'Управління та адміністрування': ['071 Облік і оподаткування',
+                                      '073 Менеджмент'],
+    'Гуманітарні науки': ['032 Історія та археологія', '035 Філологія'],
+}
+# directions of 2014 pages, see data_parser.directions
+DIRECTIONS = ['6.030401 Правознавство', '6.030202 Міжнародне право',
+              '6.050103 Програмна інженерія', "6.050101 Комп'ютерні науки",
+              '6.030509 Облік і аудит', '6.030601 Менеджмент',
+              '6.020302 Історія', '6.020303 Філологія']
+CITIES = ['м. Київ', 'м. Львів', 'м. Харків', 'м. Одеса', 'м. Дніпро']
+EDUCATION_FORMS = ['денна', 'заочна']
+STATE_SCORE = 'background:#dfd'
+
+
+def get_full_name(rng: random.Random) -> str:
+    return f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} ' \
+        f'{rng.choice(MIDDLE_NAMES)}'
+
+
+def generate_row_2017(rank: int, rng: random.Random) -> str:
+    is_enrolled = rng.random() < 0.3
+    style = STATE_SCORE if is_enrolled else 'background:#fff'
+    title = ' title="Зараховано"' if is_enrolled else ''
+    details = ''.join(
+        f'<div>{exam} (ЗНО) {rng.uniform(100, 200):.2f}</div>'
+        for exam in rng.sample(EXAMS, 3))
+    details += '<div>Середній бал документа про освіту ' \
+               f'{rng.uniform(2, 12):.2f}</div>'
+    if rng.random() < 0.05:
+        details += '<div>Переможець Всеукраїнської олімпіади або конкурсу ' \
+                   'МАН 10.0</div>'
+    if rng.random() < 0.1:
+        details += f'<div>Творчий конкурс {rng.uniform(100, 200):.2f}</div>'
+    coefficients = f'РK: {rng.choice(["1.00", "1.02", "—"])}\nСK: —\n' \
+                   f'ГK: {rng.choice(["1.00", "1.02"])}\nПК: —'
+    return (f'<tr{title}><td style="{style}">{rank}</td>'
+            f'<td>{get_full_name(rng)}</td><td>Д</td>'
+            f'<td>{rng.choice(["1", "2", "3", "—"])}</td>'
+            f'<td>{rng.uniform(120, 200):.3f}</td>'
+            f'<td><div>{details}</div></td><td>{coefficients}</td>'
+            f'<td>{rng.choice(["—", "+"])}</td>'
+            f'<td>{rng.choice(["+", "—"])}</td></tr>\n')
+
+
+def generate_page_2017(n_rows: int, rng: random.Random) -> str:
+    course = rng.choice(sum(AREAS.values(), []))
+    return ('<html><head><meta charset="utf-8"></head><body>\n'
+            '<div class="title-page"><h1>Конкурсний список</h1>'
+            f'<p><b>Бакалавр</b>Спеціальність: {course}<br>'
+            'Освітній ступінь: Бакалавр<br>'
+            f'Форма навчання: {rng.choice(EDUCATION_FORMS)}<br></p></div>\n'
+            '<table class="tablesaw tablesaw-stack tablesaw-sortable">'
+            '<thead><tr><th>#</th></tr></thead><tbody>\n' +
+            ''.join(generate_row_2017(rank + 1, rng)
+                    for rank in range(n_rows)) +
+            '</tbody></table></body></html>')
+
+
+def generate_row_2014(rank: int, rng: random.Random) -> str:
+    style = f' style="{STATE_SCORE}"' if rng.random() < 0.3 else ''
+    exams = ''.join(f'<div>{exam}:{rng.randint(100, 200)}</div>'
+                    for exam in rng.sample(EXAMS, 3))
+    extra_points = rng.choice(['', '', '', '10/0', '0/10'])
+    return (f'<tr><td{style}>{rank}</td><td>{get_full_name(rng)}</td>'
+            f'<td>{rng.uniform(120, 200):.2f}</td>'
+            f'<td>{rng.uniform(2, 12):.2f}</td><td>{exams}</td>'
+            f'<td><div>Творчий конкурс:{rng.randint(100, 200)}</div></td>'
+            f'<td>{extra_points}</td><td>{rng.choice(["+", "-"])}</td>'
+            f'<td>-</td><td>-</td><td>{rng.choice(["+/1", "-/2"])}</td>'
+            '</tr>\n')
+
+
+def generate_page_2014(n_rows: int, rng: random.Random) -> str:
+    return ('<html><head><meta charset="utf-8"></head><body>'
+            '<div id=title><p><b>Конкурсний список</b><br>'
+            f'Напрям: {rng.choice(DIRECTIONS)}<br>'
+            f'{rng.choice(EDUCATION_FORMS)}</p></div>\n'
+            '<table><thead><tr><th>#</th></tr></thead><tbody>' +
+            ''.join(generate_row_2014(rank + 1, rng)
+                    for rank in range(n_rows)) +
+            '</tbody><thead><tr><th>#</th></tr></thead></table>'
+            '</body></html>')
+
+
+def generate_univ_page(univ_id: int, rng: random.Random) -> str:
+    """
+    First 9 rows of the table are info of university, next rows are
+    courses (see data_parser.htmlparser.htmlunivparser).
+    """
+    kind = rng.choice(['національний університет', 'університет',
+                       'академія'])
+    info = [('Назва ВНЗ:', f'Тестовий {kind} №{univ_id}'),
+            ('Тип ВНЗ:', kind.split()[-1].capitalize()),
+            ('Адреса:', f'{rng.choice(CITIES)}, вул. Тестова, {univ_id}')]
+    info += [(f'Поле {i}:', '') for i in range(9 - len(info))]
+    rows = ''.join(f'<tr><td>{key}</td><td>{value}</td></tr>'
+                   for key, value in info)
+    for area in rng.sample(list(AREAS), 2):
+        for course in AREAS[area]:
+            rows += (f'<tr><td><span title="Галузь">{area}</span>'
+                     f'<span title="Спеціальність">{course}</span></td>'
+                     '<td>Бакалавр</td></tr>')
+    return '<html><head><meta charset="utf-8"></head><body><table>' + \
+        rows + '</table></body></html>'
+
+
+PAGE_GENERATORS = {'2014': generate_page_2014, '2017': generate_page_2017}
+
+
+def generate_pages(path: str, page_format: str, n_files: int, n_rows: int,
+                   n_univs: int, seed: int = 0) -> list:
+    """
+    Writes admission lists to path/<format> and pages of universities to
+    path/univs. Names of files are the same as on vstup.info.
+    :return: paths of admission lists
+    """
+    rng = random.Random(seed)
+    lists_path = os.path.join(path, page_format)
+    univs_path = os.path.join(path, 'univs')
+    os.makedirs(lists_path, exist_ok=True)
+    os.makedirs(univs_path, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        univ_id = i % n_univs + 1
+        file_path = os.path.join(lists_path, f'i{univ_id}p{i}.html')
+        with open(file_path, 'w', encoding='utf-8') as page:
+            page.write(PAGE_GENERATORS[page_format](n_rows, rng))
+        paths.append(file_path)
+    for univ_id in range(1, n_univs + 1):
+        with open(os.path.join(univs_path, f'i{univ_id}.html'), 'w',
+                  encoding='utf-8') as page:
+            page.write(generate_univ_page(univ_id, rng))
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic pages of vstup.info')
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--format', choices=sorted(PAGE_GENERATORS),
+                        default='2017')
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--univs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate_pages(args.path, args.format, args.files, args.rows,
+                   args.univs, args.seed)
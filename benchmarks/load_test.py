@@ -0,0 +1,85 @@
+"""
+Load test of running application: requests per second and latency
+percentiles of GET / and POST / at different concurrency levels.
+
+gunicorn -c gunicorn.conf.py wsgi:app
+python -m benchmarks.load_test --url http://localhost:8080/ \
+    --concurrency 1 8 32 --requests 500
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# filters of tests/test_app.py, cycled by POST requests
+FILTERS = [
+    {'filter': {'knowledge_areas': ['Право'], 'regions': ['місто Київ'],
+                'years': [2017], 'enrolled_only': True}},
+    {'filter': {'knowledge_areas': ['Право'], 'regions': ['місто Київ'],
+                'part_top_applicants': {'type': 'overall', 'value': 20},
+                'years': [2017], 'enrolled_only': True}},
+    {'filter': {'knowledge_areas': ['Інформатика та обчислювальна техніка']}},
+    {'filter': {'univ_titles': [
+        'Київський національний університет імені Тараса Шевченка']}}
+]
+
+
+def get_percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * len(values))))
+    return values[index]
+
+
+def run(url: str, method: str, concurrency: int, n_requests: int) -> dict:
+    local = threading.local()
+
+    def send(i: int) -> (float, bool):
+        # one connection (session) per thread, like a browser would keep
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        started_at = time.perf_counter()
+        if method == 'GET':
+            response = local.session.get(url)
+        else:
+            response = local.session.post(
+                url, data=json.dumps(FILTERS[i % len(FILTERS)]),
+                headers={'Content-Type': 'application/json'})
+        return time.perf_counter() - started_at, response.ok
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(n_requests)))
+    seconds = time.perf_counter() - started_at
+    latencies = [latency * 1000 for latency, _ in results]
+    return {'method': method, 'concurrency': concurrency,
+            'requests_per_second': n_requests / seconds,
+            'p50_ms': get_percentile(latencies, 50),
+            'p99_ms': get_percentile(latencies, 99),
+            'errors': sum(1 for _, ok in results if not ok)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of application')
+    parser.add_argument('--url', default='http://localhost:8080/')
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per method and concurrency level')
+    args = parser.parse_args()
+
+    print(f'{"method":6} {"threads":>7} {"req/s":>9} {"p50 ms":>9} '
+          f'{"p99 ms":>9} {"errors":>6}')
+    for method in ['GET', 'POST']:
+        for concurrency in args.concurrency:
+            result = run(args.url, method, concurrency, args.requests)
+            print(f'{result["method"]:6} {result["concurrency"]:7d} '
+                  f'{result["requests_per_second"]:9.1f} '
+                  f'{result["p50_ms"]:9.1f} {result["p99_ms"]:9.1f} '
+                  f'{result["errors"]:6d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares speed of parsing rows of 2017 admission lists: getters of
+HtmlParser2017 (create_request_dictionary_from_raw_data) and single pass
+extractor (create_request).
+
+python -m benchmarks.parser2017 --path <path to downloaded html files>
+
+Synthetic pages are made by benchmarks.generator.
+"""
+import argparse
+import os
+import time
+
+from data_parser.htmlparser.htmlparser2017 import HtmlParser2017
+from data_parser.properties import FILE_ENCODING
+from data_parser.vstup2017 import create_request, \
+    create_request_dictionary_from_raw_data, \
+    get_common_info_and_create_base_request, is_list_file
+
+
+def load_rows(path_to_data: str, max_files: int) -> list:
+    """
+    :return: array of (rows of page, base request of page)
+    """
+    pages = []
+    for subdir, _, files in os.walk(path_to_data):
+        for file_name in filter(is_list_file, files):
+            with open(os.path.join(subdir, file_name),
+                      encoding=FILE_ENCODING) as source:
+                file_string = source.read()
+            base_request = get_common_info_and_create_base_request(
+                file_name, file_string)
+            if base_request is None:
+                continue
+            rows = [row for row in
+                    HtmlParser2017.get_requests_from_page(file_string)
+                    if row.getchildren()]
+            pages.append((rows, base_request))
+            if len(pages) >= max_files:
+                return pages
+    return pages
+
+
+def run_getters(pages: list) -> list:
+    return [create_request_dictionary_from_raw_data(row, base_request)
+            for rows, base_request in pages for row in rows]
+
+
+def run_extractor(pages: list) -> list:
+    return [create_request(row, base_request)
+            for rows, base_request in pages for row in rows]
+
+
+def measure(function, pages: list, repeat: int) -> (float, list):
+    """
+    :return: (best rows per second, results)
+    """
+    best, results = None, []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        results = function(pages)
+        seconds = time.perf_counter() - started_at
+        best = seconds if best is None else min(best, seconds)
+    return len(results) / best if best else 0.0, results
+
+
+def run_benchmark(pages: list, repeat: int = 3) -> dict:
+    getters_speed, expected = measure(run_getters, pages, repeat)
+    extractor_speed, actual = measure(run_extractor, pages, repeat)
+    assert expected == [x.to_document() for x in actual], \
+        'Extractor results differ from getters'
+    return {'rows': len(actual),
+            'getters_rows_per_second': getters_speed,
+            'extractor_rows_per_second': extractor_speed,
+            'speedup': extractor_speed / getters_speed
+            if getters_speed else 0.0}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', dest='path', type=str,
+                        help='path to downloaded html files', required=True)
+    parser.add_argument('--files', dest='files', type=int,
+                        help='max number of files to load', default=100)
+    parser.add_argument('--repeat', dest='repeat', type=int,
+                        help='number of runs, the best is taken', default=3)
+    args = parser.parse_args()
+    for key, value in run_benchmark(
+            load_rows(args.path, args.files), args.repeat).items():
+        print(f'{key}: {value:.2f}' if isinstance(value, float)
+              else f'{key}: {value}')
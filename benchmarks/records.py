@@ -0,0 +1,84 @@
+"""
+Compares memory of a buffer of parsed 2017 admission requests and speed
+of encoding them to BSON: dicts (as returned by vars of plain objects)
+and slotted records of data_parser.AdmissionRequest.
+
+python -m benchmarks.records --path <path to downloaded html files>
+
+Synthetic pages are made by benchmarks.generator.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from copy import deepcopy
+
+from data_parser.properties import NUM_RESULTS_TO_SAVE
+from data_parser.vstup2017 import is_list_file, \
+    process_file_with_admission_requests
+from db.db import BulkWriter
+
+
+def load_records(path_to_data: str, n_records: int) -> list:
+    records = []
+    for subdir, _, files in os.walk(path_to_data):
+        for file_name in filter(is_list_file, files):
+            records.extend(process_file_with_admission_requests(
+                os.path.join(subdir, file_name)))
+    if not records:
+        return records
+    # repeat records of the pages to fill the buffer of a worker
+    records = records * (n_records // len(records) + 1)
+    return records[:n_records]
+
+
+def measure_memory(function) -> float:
+    """
+    :return: memory (MB) retained by result of the function
+    """
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size / 2 ** 20
+
+
+def measure_speed(function, records: list) -> float:
+    """
+    :return: records per second
+    """
+    started_at = time.perf_counter()
+    function(records)
+    return len(records) / (time.perf_counter() - started_at)
+
+
+def run_benchmark(records: list) -> dict:
+    documents = [x.to_document() for x in records]
+    return {
+        'records': len(records),
+        'dicts_buffer_mb': measure_memory(
+            lambda: [deepcopy(x) for x in documents]),
+        'records_buffer_mb': measure_memory(
+            lambda: [deepcopy(x) for x in records]),
+        'bson_buffer_mb': measure_memory(
+            lambda: [x.to_bson() for x in records]),
+        'dicts_encode_per_second': measure_speed(
+            lambda items: [BulkWriter._encode(x) for x in items], documents),
+        'records_encode_per_second': measure_speed(
+            lambda items: [x.to_bson() for x in items], records),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', dest='path', type=str,
+                        help='path to downloaded html files', required=True)
+    parser.add_argument('--records', dest='records', type=int,
+                        help='number of records in buffer',
+                        default=NUM_RESULTS_TO_SAVE)
+    args = parser.parse_args()
+    for key, value in run_benchmark(
+            load_records(args.path, args.records)).items():
+        print(f'{key}: {value:.2f}' if isinstance(value, float)
+              else f'{key}: {value}')
@@ -0,0 +1,236 @@
+"""
+Benchmark suite of ingest on synthetic pages (see benchmarks.generator):
+parse speed of every page format, speed of 2017 row extractors, ingest
+speed to MongoDB and memory peaks. Results are appended to results file and
+compared with the previous run with the same parameters.
+
+python -m benchmarks.suite --files 50 --rows 200 --host localhost
+python -m benchmarks.suite --files 50 --rows 200 --mongomock
+"""
+import argparse
+import json
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from pymongo import MongoClient
+
+try:
+    import mongomock
+except ImportError:  # stand-in of mongod is optional
+    mongomock = None
+
+from benchmarks.generator import generate_pages
+from benchmarks.parser2017 import load_rows, run_benchmark
+from data_parser.formats import FORMATS
+from db.db import BulkWriter
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), 'results.jsonl')
+# year of pages generated for every format
+FORMAT_YEARS = {'2014': 2014, '2017': 2017}
+# metrics which are better when lower, others are better when higher
+LOWER_IS_BETTER = ('_mb',)
+
+
+class MongomockBulkWriter(BulkWriter):
+    """
+    mongomock stores documents instead of raw BSON, so records are
+    converted to dicts instead of being encoded.
+    """
+
+    @staticmethod
+    def _encode(document) -> dict:
+        return document.to_document() if hasattr(document, 'to_document') \
+            else document
+
+
+def measure_parse(process_file, paths: list, repeat: int) -> float:
+    """
+    :return: best rows per second
+    """
+    best, n_rows = None, 0
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        n_rows = sum(len(process_file(path)) for path in paths)
+        seconds = time.perf_counter() - started_at
+        best = seconds if best is None else min(best, seconds)
+    return n_rows / best if best else 0.0
+
+
+def get_peak_rss(name: str, year: int, stream: bool, path: str) -> float:
+    """
+    Runs in a new process, so the peak belongs to one page only.
+    :return: peak resident memory (MB) of the process after a page is
+    processed
+    """
+    FORMATS[name].get_process_file(year, stream)(path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def measure_peak_memory(name: str, year: int, stream: bool,
+                        path: str) -> float:
+    """
+    tracemalloc does not see the C heap of libxml2 where lxml keeps trees,
+    so resident memory of a new process is measured instead. The process is
+    forked from the fork server, as Linux children inherit peak memory of
+    the parent (see run_suite).
+    :return: peak resident memory (MB) while a page is processed
+    """
+    with multiprocessing.get_context('forkserver').Pool(1) as pool:
+        return pool.apply(get_peak_rss, (name, year, stream, path))
+
+
+def measure_ingest(db, process_file, paths: list, batch_size: int,
+                   writer_class=BulkWriter) -> float:
+    """
+    Parses pages and writes requests in one process, like a worker of
+    data_parser.pipeline does.
+    :return: inserted documents per second
+    """
+    collection = db.benchmark_requests
+    collection.drop()
+    writer = writer_class(collection, batch_size)
+    started_at = time.perf_counter()
+    for path in paths:
+        writer.extend(process_file(path))
+    stats = writer.close()
+    seconds = time.perf_counter() - started_at
+    collection.drop()
+    return stats['inserted'] / seconds if seconds else 0.0
+
+
+def connect(args):
+    """
+    :return: (database, writer class), database is None if disabled
+    """
+    if args.mongomock:
+        if mongomock is None:
+            raise RuntimeError('mongomock is not installed')
+        return mongomock.MongoClient()[args.db], MongomockBulkWriter
+    if args.host:
+        return MongoClient(args.host)[args.db], BulkWriter
+    return None, BulkWriter
+
+
+def run_suite(args) -> dict:
+    # started before pages are parsed, so its peak memory is small
+    multiprocessing.forkserver.ensure_running()
+    db, writer_class = connect(args)
+    metrics = {}
+    with tempfile.TemporaryDirectory() as path:
+        for name, page_format in sorted(FORMATS.items()):
+            year = FORMAT_YEARS[name]
+            paths = generate_pages(path, name, args.files, args.rows,
+                                   args.univs)
+            for mode, stream in [('parse', False), ('parse_stream', True)]:
+                process_file = page_format.get_process_file(year, stream)
+                metrics[f'{mode}.{name}.rows_per_second'] = measure_parse(
+                    process_file, paths, args.repeat)
+                metrics[f'{mode}.{name}.peak_rss_mb'] = measure_peak_memory(
+                    name, year, stream, paths[0])
+            if db is not None:
+                metrics[f'ingest.{name}.docs_per_second'] = measure_ingest(
+                    db, page_format.get_process_file(year), paths,
+                    args.batch_size, writer_class)
+        extractors = run_benchmark(
+            load_rows(os.path.join(path, '2017'), args.files), args.repeat)
+        for key in ['getters_rows_per_second', 'extractor_rows_per_second']:
+            metrics[f'parser2017.{key}'] = extractors[key]
+    return metrics
+
+
+def get_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_previous(results_path: str, params: dict) -> dict:
+    """
+    :return: the last result with the same parameters
+    """
+    previous = None
+    if os.path.exists(results_path):
+        with open(results_path, encoding='utf-8') as results:
+            for line in results:
+                result = json.loads(line)
+                if result['params'] == params:
+                    previous = result
+    return previous
+
+
+def find_regressions(previous: dict, metrics: dict,
+                     tolerance: float) -> list:
+    """
+    :param tolerance: allowed relative change to the worse side
+    :return: array of (metric, previous value, new value)
+    """
+    regressions = []
+    for metric, value in metrics.items():
+        old = previous['metrics'].get(metric)
+        if not old:
+            continue
+        change = (value - old) / old
+        if metric.endswith(LOWER_IS_BETTER):
+            change = -change
+        if change < -tolerance:
+            regressions.append((metric, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of ingest')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--univs', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs, the best is taken')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--host', default=None,
+                        help='MongoDB to measure ingest, skipped if missing')
+    parser.add_argument('--mongomock', action='store_true',
+                        help='measure ingest to mongomock instead of MongoDB')
+    parser.add_argument('--db', default='ispyt_benchmark')
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    params = {'files': args.files, 'rows': args.rows,
+              'batch_size': args.batch_size,
+              'backend': 'mongomock' if args.mongomock else
+              'mongodb' if args.host else None,
+              'python': platform.python_version(),
+              'machine': platform.node()}
+    metrics = run_suite(args)
+    for metric, value in sorted(metrics.items()):
+        print(f'{metric:45} {value:12.2f}')
+
+    previous = load_previous(args.results, params)
+    with open(args.results, 'a', encoding='utf-8') as results:
+        results.write(json.dumps({
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'revision': get_revision(), 'params': params,
+            'metrics': metrics}) + '\n')
+    if previous is None:
+        return
+    regressions = find_regressions(previous, metrics, args.tolerance)
+    for metric, old, new in regressions:
+        print(f'REGRESSION {metric}: {old:.2f} -> {new:.2f} '
+              f'(revision {previous["revision"]})')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
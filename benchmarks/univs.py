@@ -0,0 +1,73 @@
+"""
+Compares speed of parsing pages of universities: BeautifulSoup parsers of
+htmlunivparser, which read and parse every page twice (universities and
+areas are loaded separately), and single pass lxml extractor, serially and
+on a process pool.
+
+python -m benchmarks.univs --path <path to downloaded univ pages>
+
+Synthetic pages are made by benchmarks.generator.
+"""
+import argparse
+import multiprocessing
+import time
+
+from data_parser.htmlparser.htmlunivparser import get_area_course_info, \
+    get_univ_info_from_page_2017
+from data_parser.vstup2017 import extract_univ_file, get_univ_files
+
+
+def run_beautifulsoup(paths: list) -> list:
+    results = []
+    for path in paths:
+        with open(path, 'rb') as file:
+            univ = get_univ_info_from_page_2017(file.read())
+        with open(path, 'rb') as file:
+            area_courses = get_area_course_info(file.read())
+        results.append((univ, area_courses))
+    return results
+
+
+def run_extractor(paths: list) -> list:
+    return [extract_univ_file(path) for path in paths]
+
+
+def run_extractor_pool(paths: list, workers: int) -> list:
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(extract_univ_file, paths, chunksize=10)
+
+
+def measure(function, *args) -> (float, list):
+    """
+    :return: (pages per second, results)
+    """
+    started_at = time.perf_counter()
+    results = function(*args)
+    seconds = time.perf_counter() - started_at
+    return len(results) / seconds if seconds else 0.0, results
+
+
+def run_benchmark(paths: list, workers: int) -> dict:
+    # results are compared by tests/test_data_parser.py
+    bs_speed, _ = measure(run_beautifulsoup, paths)
+    extractor_speed, _ = measure(run_extractor, paths)
+    pool_speed, _ = measure(run_extractor_pool, paths, workers)
+    return {'pages': len(paths),
+            'beautifulsoup_pages_per_second': bs_speed,
+            'extractor_pages_per_second': extractor_speed,
+            'extractor_pool_pages_per_second': pool_speed,
+            'speedup': extractor_speed / bs_speed if bs_speed else 0.0,
+            'pool_speedup': pool_speed / bs_speed if bs_speed else 0.0}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', dest='path', type=str,
+                        help='path to downloaded univ pages', required=True)
+    parser.add_argument('--workers', dest='workers', type=int,
+                        help='number of workers', default=4)
+    args = parser.parse_args()
+    for key, value in run_benchmark(
+            get_univ_files(args.path), args.workers).items():
+        print(f'{key}: {value:.2f}' if isinstance(value, float)
+              else f'{key}: {value}')
@@ -0,0 +1,64 @@
+"""
+Measures cost of validation of body of POST / (src.validator) per request:
+typical, invalid and oversized (hostile) bodies.
+
+python -m benchmarks.validator --repeat 5 --number 20000
+"""
+import argparse
+import time
+
+from src.exceptions import ValidationError
+from src.validator import check_filter_request, MAX_ITEMS
+
+BODIES = {
+    'valid': {'filter': {
+        'knowledge_areas': ['Право', 'Інформаційні технології'],
+        'regions': ['місто Київ', 'Львівська область'],
+        'part_top_applicants': {'type': 'overall', 'value': 20},
+        'years': [2016, 2017],
+        'enrolled_only': True}},
+    'invalid': {'filter': {
+        'knowledge_areas': ['Пр'],
+        'part_top_applicants': {'type': 'best', 'value': 120},
+        'years': ['2017'],
+        'enrolled_only': 'true'}},
+    'oversized': {'filter': {
+        'univ_ids': list(range(100 * MAX_ITEMS['univ_ids']))}},
+}
+
+
+def validate(body):
+    try:
+        check_filter_request(body)
+    except ValidationError:
+        pass
+
+
+def measure(body, number: int, repeat: int) -> float:
+    """
+    :return: best microseconds per request
+    """
+    best = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            validate(body)
+        seconds = time.perf_counter() - started_at
+        best = seconds if best is None else min(best, seconds)
+    return best / number * 10 ** 6
+
+
+def run_benchmark(number: int = 10000, repeat: int = 3) -> dict:
+    return {f'{name}_us_per_request': measure(body, number, repeat)
+            for name, body in BODIES.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', dest='number', type=int,
+                        help='requests per run', default=10000)
+    parser.add_argument('--repeat', dest='repeat', type=int,
+                        help='number of runs, the best is taken', default=3)
+    args = parser.parse_args()
+    for key, value in run_benchmark(args.number, args.repeat).items():
+        print(f'{key}: {value:.2f}')
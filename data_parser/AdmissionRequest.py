@@ -1,7 +1,31 @@
+from operator import attrgetter
+
+from bson import BSON
+from bson.raw_bson import RawBSONDocument
+
+# fields set by data_parser.ranking
+RANK_FIELDS = ('zno_score', 'top_overall', 'top_gov_exams',
+               'top_school_score')
+
+
 class AbstractAdmissionRequest(object):
+    """
+    Record of admission request with fixed schema. Records support item
+    access, so they can be processed as dict of request.
+    """
+    __slots__ = ('univ_id', 'year', 'course_id', 'list_id', 'is_denna',
+                 'is_zaochna', 'full_name', 'first_name', 'middle_name',
+                 'last_name', 'total_score', 'school_score', 'gov_exams',
+                 'univ_exams', 'extra_points', 'is_original', 'is_enrolled',
+                 'rank') + RANK_FIELDS
+    FIELDS = __slots__
+    _get_values = attrgetter(*FIELDS)
+
     def __init__(self, univ_id: int, list_id: int,
-                 is_denna: bool, is_zaochna: bool, course_id: str):
+                 is_denna: bool, is_zaochna: bool, course_id: str,
+                 year: int = None):
         self.univ_id = univ_id
+        self.year = year
         self.course_id = course_id
         self.list_id = list_id
         self.is_denna = is_denna
@@ -18,15 +42,51 @@ class AbstractAdmissionRequest(object):
         self.is_original = False
         self.is_enrolled = False
         self.rank = 0
+        self.zno_score = 0.0
+        self.top_overall = None
+        self.top_gov_exams = None
+        self.top_school_score = None
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __repr__(self):
+        return repr(self.to_document())
+
+    def to_tuple(self) -> tuple:
+        """
+        :return: values of fields in order of FIELDS
+        """
+        return self._get_values(self)
+
+    def to_document(self) -> dict:
+        return dict(zip(self.FIELDS, self.to_tuple()))
+
+    def to_bson(self) -> RawBSONDocument:
+        """
+        Encodes the record to BSON to be written to db. Keys are not
+        checked, exam names may contain dots.
+        """
+        return RawBSONDocument(BSON.encode(self.to_document()))
 
 
 class AdmissionRequest2014(AbstractAdmissionRequest):
+    __slots__ = ('is_out_of_competition', 'is_prioritized', 'is_directed',
+                 'num_applications', 'num_recommendations')
+    FIELDS = AbstractAdmissionRequest.FIELDS + __slots__
+    _get_values = attrgetter(*FIELDS)
+
     def __init__(self, base: AbstractAdmissionRequest):
         super(AdmissionRequest2014, self).__init__(
             base.univ_id,
             base.list_id,
             base.is_denna,
-            base.is_zaochna
+            base.is_zaochna,
+            base.course_id,
+            base.year
         )
         self.is_out_of_competition = False
         self.is_prioritized = False
@@ -36,13 +96,18 @@ class AdmissionRequest2014(AbstractAdmissionRequest):
 
 
 class AdmissionRequest2017(AbstractAdmissionRequest):
+    __slots__ = ('priority', 'coefficients', 'is_quota')
+    FIELDS = AbstractAdmissionRequest.FIELDS + __slots__
+    _get_values = attrgetter(*FIELDS)
+
     def __init__(self, base: AbstractAdmissionRequest):
         super(AdmissionRequest2017, self).__init__(
             base.univ_id,
             base.list_id,
             base.is_denna,
             base.is_zaochna,
-            base.course_id
+            base.course_id,
+            base.year
         )
         self.priority = 0
         self.coefficients = {}
@@ -1,5 +1,9 @@
 import argparse
 
+from data_parser.properties import NUM_RESULTS_TO_SAVE, BULK_FLUSH_INTERVAL, \
+    FILES_PER_CHUNK, GEOCODING_API_KEY, GEOCODING_CACHE_PATH, \
+    GEOCODING_WORKERS, GEOCODING_RATE
+
 
 def create_input_argument_parser() -> argparse.ArgumentParser:
     """
@@ -9,12 +13,59 @@ def create_input_argument_parser() -> argparse.ArgumentParser:
     parser.add_argument('--db', dest='db', type=str,
                         help='database name to insert data', required=True)
     parser.add_argument('--erase', dest='erase', action='store_true',
-                        help='erases db before inserting data')
+                        help='erases data of the target before inserting, '
+                             'only requests of --year for requests')
     parser.add_argument('--path', dest='path', type=str,
                         help='path to downloaded html files', required=True)
     parser.add_argument('--host', dest='db_host', type=str,
                         help='db host', default='localhost')
     parser.add_argument('--workers', dest='workers', type=int,
                         help='number of workers', default=4)
-    parser.set_defaults(erase=False)
+    parser.add_argument('--chunk-size', dest='chunk_size', type=int,
+                        help='number of files sent to a worker at once',
+                        default=FILES_PER_CHUNK)
+    parser.add_argument('--batch-size', dest='batch_size', type=int,
+                        help='number of results in one bulk write',
+                        default=NUM_RESULTS_TO_SAVE)
+    parser.add_argument('--flush-interval', dest='flush_interval',
+                        type=float, default=BULK_FLUSH_INTERVAL,
+                        help='max seconds to keep results before writing')
+    parser.add_argument('--write-concern', dest='write_concern', type=str,
+                        help='write concern: number of nodes or "majority"',
+                        default=None)
+    parser.add_argument('--stream', dest='stream', action='store_true',
+                        help='parse pages incrementally to save memory')
+    parser.add_argument('--year', dest='year', type=int,
+                        help='year of admission', default=2017)
+    parser.add_argument('--format', dest='format', type=str, default=None,
+                        help='layout of pages (see data_parser.formats), '
+                             'layout of the year by default')
+    parser.add_argument('--target', dest='target', type=str,
+                        choices=['requests', 'univs', 'areas',
+                                 'univ_pages'],
+                        help='data to load', default='requests')
+    parser.add_argument('--build-cube', dest='build_cube',
+                        action='store_true',
+                        help='rebuild requests_cube after ingest, needed '
+                             'with CUBE_QUERIES = True')
+    parser.add_argument('--geocoding-cache', dest='geocoding_cache',
+                        type=str, default=GEOCODING_CACHE_PATH,
+                        help='sqlite file with resolved addresses')
+    parser.add_argument('--geocode-online', dest='geocode_online',
+                        action='store_true',
+                        help='resolve addresses unknown to the offline '
+                             'gazetteer by Google Geocoding API')
+    parser.add_argument('--geocoding-key', dest='geocoding_key', type=str,
+                        default=GEOCODING_API_KEY,
+                        help='key of Google Geocoding API, '
+                             '$GOOGLE_MAPS_API_KEY by default')
+    parser.add_argument('--geocoding-workers', dest='geocoding_workers',
+                        type=int, default=GEOCODING_WORKERS,
+                        help='concurrent requests to Google Geocoding API')
+    parser.add_argument('--geocoding-rate', dest='geocoding_rate',
+                        type=float, default=GEOCODING_RATE,
+                        help='max requests per second to Google Geocoding '
+                             'API')
+    parser.set_defaults(erase=False, stream=False, geocode_online=False,
+                        build_cube=False)
     return parser
@@ -0,0 +1,50 @@
+"""
+Loads data of any year to database:
+
+python -m data_parser --db ispyt --path <html files> --year 2014
+python -m data_parser --db ispyt --path <html files> --target univ_pages
+"""
+from data_parser.InputArgumentParser import create_input_argument_parser
+from data_parser.formats import get_format
+from data_parser.pipeline import start_ingest
+from data_parser.vstup2017 import load_univ_pages, \
+    parse_univ_pages_and_write_to_database, \
+    parse_areas_of_study_and_write_to_database
+from db.db import connect_to_database
+from db.dictionary import ensure_dictionary_indexes
+from db.indexes import ensure_indexes, verify_indexes
+
+
+def ingest_requests(input_arguments):
+    page_format = get_format(input_arguments.year, input_arguments.format)
+    start_ingest(
+        input_arguments,
+        page_format.get_process_file(input_arguments.year,
+                                     input_arguments.stream),
+        page_format.is_list_file, input_arguments.year, page_format.version)
+
+
+TARGETS = {
+    'requests': ingest_requests,
+    'univs': parse_univ_pages_and_write_to_database,
+    'areas': parse_areas_of_study_and_write_to_database,
+    # universities, areas and courses from one pass over pages
+    'univ_pages': load_univ_pages,
+}
+
+
+def main(argv: list = None):
+    parser = create_input_argument_parser()
+    args = parser.parse_args(argv)
+    db = connect_to_database(args.db_host, args.db)
+    # before workers assign ids of courses and delete requests of reloaded
+    # files
+    ensure_dictionary_indexes(db)
+    ensure_indexes(db)
+    TARGETS[args.target](args)
+    # fails loudly if a hot query of the API scans a collection
+    verify_indexes(db)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,3 +6,7 @@ from data_parser.properties import FILE_ENCODING
 def to_utf8(string: str) -> str:
     return string.encode(FILE_ENCODING).decode('utf-8') \
         if platform.system().lower() == 'windows' else string
+
+
+def get_univ_id_and_list_id_from_filename(file_name: str):
+    return list(map(int, file_name[file_name.rindex('i') + 1:-5].split('p')))
@@ -0,0 +1,108 @@
+"""
+Crosswalk of directions (напрями підготовки) of 2014 admission lists to
+courses (спеціальності) of 2017 lists, after the table of the Ministry of
+Education (order №1151 of 06.11.2015) for bachelor directions. Titles of
+courses are the same as on pages of 2017, so requests of both years get
+the same ids of courses (see db.dictionary).
+Directions which were split between several courses are not mapped.
+"""
+import re
+from typing import Optional
+
+# {direction: course}
+DIRECTIONS = {
+    'Дошкільна освіта': '012 Дошкільна освіта',
+    'Початкова освіта': '013 Початкова освіта',
+    'Корекційна освіта': '016 Спеціальна освіта',
+    'Фізичне виховання': '017 Фізична культура і спорт',
+    'Спорт': '017 Фізична культура і спорт',
+    'Дизайн': '022 Дизайн',
+    'Образотворче мистецтво': '023 Образотворче мистецтво, декоративне '
+                              'мистецтво, реставрація',
+    'Хореографія': '024 Хореографія',
+    'Музичне мистецтво': '025 Музичне мистецтво',
+    'Книгознавство, бібліотекознавство і бібліографія':
+        '029 Інформаційна, бібліотечна та архівна справа',
+    'Документознавство та інформаційна діяльність':
+        '029 Інформаційна, бібліотечна та архівна справа',
+    'Історія': '032 Історія та археологія',
+    'Філософія': '033 Філософія',
+    'Культурологія': '034 Культурологія',
+    'Філологія': '035 Філологія',
+    'Економічна теорія': '051 Економіка',
+    'Економічна кібернетика': '051 Економіка',
+    'Міжнародна економіка': '051 Економіка',
+    'Економіка підприємства': '051 Економіка',
+    'Управління персоналом і економіка праці': '051 Економіка',
+    'Політологія': '052 Політологія',
+    'Психологія': '053 Психологія',
+    'Практична психологія': '053 Психологія',
+    'Соціологія': '054 Соціологія',
+    'Журналістика': '061 Журналістика',
+    "Реклама і зв'язки з громадськістю": '061 Журналістика',
+    'Видавнича справа та редагування': '061 Журналістика',
+    'Облік і аудит': '071 Облік і оподаткування',
+    'Фінанси і кредит': '072 Фінанси, банківська справа та страхування',
+    'Менеджмент': '073 Менеджмент',
+    'Маркетинг': '075 Маркетинг',
+    'Товарознавство і торговельне підприємництво':
+        '076 Підприємництво, торгівля та біржова діяльність',
+    'Правознавство': '081 Право',
+    'Біологія': '091 Біологія',
+    'Екологія, охорона навколишнього середовища та збалансоване '
+    'природокористування': '101 Екологія',
+    'Хімія': '102 Хімія',
+    'Геологія': '103 Науки про Землю',
+    'Фізика': '104 Фізика та астрономія',
+    'Географія': '106 Географія',
+    'Математика': '111 Математика',
+    'Прикладна математика': '113 Прикладна математика',
+    'Програмна інженерія': '121 Інженерія програмного забезпечення',
+    "Комп'ютерні науки": "122 Комп'ютерні науки",
+    'Інформатика': "122 Комп'ютерні науки",
+    "Комп'ютерна інженерія": "123 Комп'ютерна інженерія",
+    'Системний аналіз': '124 Системний аналіз',
+    'Безпека інформаційних і комунікаційних систем': '125 Кібербезпека',
+    'Інженерна механіка': '131 Прикладна механіка',
+    'Електротехніка та електротехнології':
+        '141 Електроенергетика, електротехніка та електромеханіка',
+    "Автоматизація та комп'ютерно-інтегровані технології":
+        "151 Автоматизація та комп'ютерно-інтегровані технології",
+    'Хімічна технологія': '161 Хімічні технології та інженерія',
+    'Радіотехніка': '172 Телекомунікації та радіотехніка',
+    'Телекомунікації': '172 Телекомунікації та радіотехніка',
+    'Харчові технології та інженерія': '181 Харчові технології',
+    'Архітектура': '191 Архітектура та містобудування',
+    'Будівництво': '192 Будівництво та цивільна інженерія',
+    'Геодезія, картографія та землеустрій': '193 Геодезія та землеустрій',
+    'Агрономія': '201 Агрономія',
+    'Лісове і садово-паркове господарство': '205 Лісове господарство',
+    'Лікувальна справа': '222 Медицина',
+    'Сестринська справа': '223 Медсестринство',
+    'Фармація': '226 Фармація, промислова фармація',
+    'Соціальна робота': '231 Соціальна робота',
+    'Готельно-ресторанна справа': '241 Готельно-ресторанна справа',
+    'Туризм': '242 Туризм',
+    'Пожежна безпека': '261 Пожежна безпека',
+    'Правоохоронна діяльність': '262 Правоохоронна діяльність',
+    'Міжнародні відносини': '291 Міжнародні відносини, суспільні '
+                            'комунікації та регіональні студії',
+    'Міжнародні економічні відносини': '292 Міжнародні економічні відносини',
+    'Міжнародне право': '293 Міжнародне право',
+}
+APOSTROPHES = re.compile('[’ʼ`‘]')
+# code of direction, e.g. 6.030401
+CODE = re.compile(r'^\d+(\.\d+)*\s*')
+
+_COURSES = {direction.casefold(): course
+            for direction, course in DIRECTIONS.items()}
+
+
+def get_course(direction: str) -> Optional[str]:
+    """
+    :param direction: direction from header of 2014 page, with or without
+    its code
+    :return: title of course or None if direction is not mapped
+    """
+    direction = CODE.sub('', APOSTROPHES.sub("'", direction.strip()))
+    return _COURSES.get(direction.casefold())
@@ -0,0 +1,64 @@
+"""
+Layouts of pages with admission lists. Rows of each layout are parsed by
+its IHtmlParser (see data_parser.htmlparser) into AdmissionRequest records
+of the same schema, so all years are loaded by data_parser.pipeline.
+"""
+from functools import partial
+
+from data_parser import vstup2014, vstup2017
+
+
+class PageFormat(object):
+    def __init__(self, name: str, version: str, process_file, stream_file,
+                 is_list_file):
+        """
+        :param name: name of layout
+        :param version: version of parser, files are reloaded when changed
+        :param process_file: function(path, year) -> list of records
+        :param stream_file: the same as process_file, parses incrementally
+        :param is_list_file: function(file_name) -> bool
+        """
+        self.name = name
+        self.version = version
+        self.process_file = process_file
+        self.stream_file = stream_file
+        self.is_list_file = is_list_file
+
+    def get_process_file(self, year: int, stream: bool = False):
+        """
+        :return: function(path) -> list of records, picklable for workers
+        """
+        return partial(self.stream_file if stream else self.process_file,
+                       year=year)
+
+
+FORMATS = {}
+
+
+def register_format(page_format: PageFormat):
+    FORMATS[page_format.name] = page_format
+
+
+register_format(PageFormat(
+    '2014', vstup2014.PARSER_VERSION, vstup2014.process_file,
+    vstup2014.stream_file, vstup2014.is_list_file))
+register_format(PageFormat(
+    '2017', vstup2017.PARSER_VERSION,
+    vstup2017.process_file_with_admission_requests,
+    vstup2017.stream_file_with_admission_requests, vstup2017.is_list_file))
+
+# layout of pages by year of admission, only years with sample pages,
+# pages of other years are loaded with --format
+YEAR_FORMATS = {2014: '2014', 2017: '2017'}
+
+
+def get_format(year: int, name: str = None) -> PageFormat:
+    """
+    :param year: year of admission
+    :param name: name of layout, layout of the year if missing
+    """
+    name = name or YEAR_FORMATS.get(year)
+    if name not in FORMATS:
+        raise ValueError(f'Unknown format of pages: year={year}, '
+                         f'format={name}')
+    return FORMATS[name]
@@ -0,0 +1,200 @@
+"""
+Resolves addresses of universities to regions (names of regions are the
+same as administrative_area_level_1 of Google Geocoding API): offline by
+names of regions and cities in the address, then by cache of previous
+network lookups, then optionally by Google Geocoding API.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from data_parser.properties import GEOCODING_API_URL, GEOCODING_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# {region: cities of the region}
+GAZETTEER = {
+    'місто Київ': ['Київ'],
+    'місто Севастополь': ['Севастополь'],
+    'Автономна Республіка Крим': ['Сімферополь', 'Ялта', 'Керч',
+                                  'Євпаторія'],
+    'Вінницька область': ['Вінниця'],
+    'Волинська область': ['Луцьк', 'Ковель'],
+    'Дніпропетровська область': ['Дніпро', 'Дніпропетровськ', 'Кривий Ріг',
+                                 "Кам'янське", 'Дніпродзержинськ',
+                                 'Нікополь'],
+    'Донецька область': ['Донецьк', 'Маріуполь', 'Краматорськ',
+                         "Слов'янськ", 'Покровськ', 'Бахмут',
+                         'Артемівськ', 'Горлівка'],
+    'Житомирська область': ['Житомир', 'Бердичів'],
+    'Закарпатська область': ['Ужгород', 'Мукачево'],
+    'Запорізька область': ['Запоріжжя', 'Мелітополь', 'Бердянськ'],
+    'Івано-Франківська область': ['Івано-Франківськ', 'Коломия'],
+    'Київська область': ['Біла Церква', 'Бровари', 'Бориспіль', 'Ірпінь',
+                         'Переяслав-Хмельницький', 'Переяслав'],
+    'Кіровоградська область': ['Кропивницький', 'Кіровоград'],
+    'Луганська область': ['Луганськ', 'Сєвєродонецьк', 'Старобільськ',
+                          'Лисичанськ'],
+    'Львівська область': ['Львів', 'Дрогобич'],
+    'Миколаївська область': ['Миколаїв'],
+    'Одеська область': ['Одеса', 'Ізмаїл'],
+    'Полтавська область': ['Полтава', 'Кременчук'],
+    'Рівненська область': ['Рівне', 'Острог'],
+    'Сумська область': ['Суми', 'Глухів', 'Конотоп'],
+    'Тернопільська область': ['Тернопіль'],
+    'Харківська область': ['Харків'],
+    'Херсонська область': ['Херсон'],
+    'Хмельницька область': ['Хмельницький', "Кам'янець-Подільський"],
+    'Черкаська область': ['Черкаси', 'Умань'],
+    'Чернівецька область': ['Чернівці'],
+    'Чернігівська область': ['Чернігів', 'Ніжин'],
+}
+APOSTROPHES = re.compile('[’ʼ`‘]')
+
+
+def _compile_patterns() -> list:
+    """
+    Names of regions ("Львівська обл.") are matched before names of cities,
+    a town of Kyiv region is not Kyiv.
+    :return: array of (pattern, region)
+    """
+    region_patterns, city_patterns = [], []
+    for region, cities in GAZETTEER.items():
+        if region.endswith(' область'):
+            name = region[:-len(' область')]
+            region_patterns.append(
+                (re.compile(rf'\b{re.escape(name)}\s+обл', re.IGNORECASE),
+                 region))
+        elif region == 'Автономна Республіка Крим':
+            region_patterns.append(
+                (re.compile(r'\bКрим\b|\bАРК\b', re.IGNORECASE), region))
+        for city in cities:
+            city_patterns.append(
+                (re.compile(rf'\b{re.escape(city)}\b', re.IGNORECASE),
+                 region))
+    return region_patterns + city_patterns
+
+
+PATTERNS = _compile_patterns()
+
+
+def resolve_offline(address: str) -> str:
+    """
+    :return: region or '' if address has no known names
+    """
+    address = APOSTROPHES.sub("'", address)
+    for pattern, region in PATTERNS:
+        if pattern.search(address):
+            return region
+    return ''
+
+
+def get_region_from_geocoding_result(result: dict) -> str:
+    for level in ['administrative_area_level_1',
+                  'administrative_area_level_2']:
+        for address_component in result['address_components']:
+            if level in address_component['types'] and \
+                    'political' in address_component['types']:
+                return address_component['long_name']
+    return ''
+
+
+def resolve_online(address: str, api_key: str) -> str:
+    """
+    :return: region by Google Geocoding API, '' if not found
+    """
+    try:
+        response = requests.get(GEOCODING_API_URL, timeout=GEOCODING_TIMEOUT,
+                                params={'address': address, 'language': 'uk',
+                                        'region': 'uk', 'key': api_key})
+        results = response.json()['results']
+        return get_region_from_geocoding_result(results[0]) if results \
+            else ''
+    except (requests.RequestException, ValueError, KeyError) as e:
+        logger.error(f'Failed to geocode {address}: {e}')
+        return ''
+
+
+class RateLimiter(object):
+    """
+    Allows calls not more often than rate per second, shared by threads.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_call_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call_at - now
+            self.next_call_at = max(now, self.next_call_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Geocoder(object):
+    def __init__(self, cache_path: str, api_key: str = None,
+                 workers: int = 4, rate: float = 10.0):
+        """
+        :param cache_path: sqlite file with results of network lookups
+        :param api_key: key of Google Geocoding API, network lookups are
+        disabled if missing
+        :param workers: concurrent network lookups
+        :param rate: max network lookups per second
+        """
+        self.cache = sqlite3.connect(cache_path)
+        self.cache.execute('CREATE TABLE IF NOT EXISTS geocoding '
+                           '(address TEXT PRIMARY KEY, region TEXT)')
+        self.api_key = api_key
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+
+    def _get_cached(self, addresses: list) -> dict:
+        result = {}
+        for address in addresses:
+            row = self.cache.execute(
+                'SELECT region FROM geocoding WHERE address = ?',
+                (address,)).fetchone()
+            if row is not None:
+                result[address] = row[0]
+        return result
+
+    def _resolve_online(self, address: str) -> str:
+        self.rate_limiter.wait()
+        return resolve_online(address, self.api_key)
+
+    def resolve_many(self, addresses: list) -> dict:
+        """
+        :return: {address: region}, region is '' if it is not resolved
+        """
+        result = {address: resolve_offline(address)
+                  for address in set(addresses)}
+        missing = [address for address, region in result.items()
+                   if not region]
+        result.update(self._get_cached(missing))
+        missing = [address for address in missing if not result[address]]
+        if missing and self.api_key:
+            with ThreadPoolExecutor(self.workers) as executor:
+                regions = list(executor.map(self._resolve_online, missing))
+            with self.cache:
+                self.cache.executemany(
+                    'INSERT OR REPLACE INTO geocoding VALUES (?, ?)',
+                    [(address, region) for address, region
+                     in zip(missing, regions) if region])
+            result.update(zip(missing, regions))
+        unresolved = [address for address, region in result.items()
+                      if not region]
+        if unresolved:
+            logger.warning(f'Regions are not found for {len(unresolved)} '
+                           f'addresses: {unresolved}')
+        return result
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,102 @@
+import logging
+
+from data_parser.htmlparser.ihtmlparser import IHtmlParser
+
+logger = logging.getLogger(__name__)
+
+
+class HtmlParser2014(IHtmlParser):
+    """
+    Rows of 2014 admission lists: rank, full name, total score, school
+    score, government exams, university exams, extra points
+    (olympiad or MAN / preparatory courses), out of competition,
+    prioritized, directed, original documents.
+    """
+
+    @staticmethod
+    def is_header(element) -> bool:
+        return element.tag == 'div' and element.get('id') == 'title'
+
+    @staticmethod
+    def get_education_form(header) -> (bool, bool):
+        """
+        :param header: html element with header of the page
+        :return: (is_denna, is_zaochna)
+        """
+        caption = header.getchildren()[-1].tail
+        is_denna = 'денна' in caption
+        is_zaochna = 'заочна' in caption
+
+        assert any((is_denna, is_zaochna)), caption
+        return is_denna, is_zaochna
+
+    @staticmethod
+    def get_direction(header) -> str:
+        """
+        :param header: html element with header of the page
+        :return: direction, e.g. "6.030401 Правознавство", '' if missing
+        """
+        for item in header.getchildren():
+            caption = item.tail
+            if caption and 'Напрям' in caption:
+                return caption.replace('Напрям', '').replace(':', '').strip()
+        return ''
+
+    @staticmethod
+    def _parse_exams(cell) -> {}:
+        """
+        Example of exams cell: <div>Математика:187</div>
+        :return: {exam_name: score}
+        """
+        exams = {}
+        for item in cell.getchildren():
+            if not item.text:
+                continue
+            name, _, score = item.text.strip().rpartition(':')
+            try:
+                exams[name.strip()] = float(score)
+            except ValueError:
+                logger.error(f'ERROR - Failed to convert {score} to float')
+        return exams
+
+    @staticmethod
+    def _parse_extra_points(text: str) -> {}:
+        olymp_man, prep_courses = 0.0, 0.0
+        if text and text.count('/') == 1:
+            values = text.strip().split('/')
+            try:
+                olymp_man, prep_courses = float(values[0]), float(values[1])
+            except ValueError:
+                pass
+        return {'olymp_man': olymp_man, 'prep': prep_courses}
+
+    @classmethod
+    def extract_request(cls, row, record):
+        """
+        Single pass extractor, the same as HtmlParser2017.extract_request.
+        :param row: html element of admission request (row of table)
+        :param record: AdmissionRequest2014 with common data for all
+        requests of the page, it is updated in place
+        :return: record
+        """
+        cells = row.getchildren()
+
+        full_name = cells[1].text.strip()
+        names = full_name.split()
+        record.full_name = full_name
+        record.last_name = names[0]
+        record.first_name = ' '.join(names[1:2])
+        record.middle_name = ' '.join(names[2:]).strip()
+
+        record.rank = int(cells[0].text)
+        record.total_score = float(cells[2].text)
+        record.school_score = float(cells[3].text)
+        record.gov_exams = cls._parse_exams(cells[4])
+        record.univ_exams = cls._parse_exams(cells[5])
+        record.extra_points = cls._parse_extra_points(cells[6].text)
+        record.is_out_of_competition = cells[7].text.strip() == '+'
+        record.is_prioritized = cells[8].text.strip() == '+'
+        record.is_directed = cells[9].text.strip() == '+'
+        record.is_original = cells[10].text.strip().split('/')[0] == '+'
+        record.is_enrolled = 'style' in cells[0].attrib
+        return record
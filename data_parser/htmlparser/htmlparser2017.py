@@ -17,6 +17,8 @@ class HtmlParser2017(IHtmlParser):
     EDUCATION_DOCUMENT = 'Середній бал документа про освіту'
     UNIVERSITY_EXAM = 'Фаховий іспит'
     N_COLUMNS_WITH_PRIORITY = 9
+    # {key in result: text of coefficient in the page}
+    COEFFICIENTS = {'РК': 'РK', 'СК': 'СK', 'ГК': 'ГK', 'ПК': 'ПК'}
 
     @staticmethod
     def _get_header_from_file_data(file_string: str):
@@ -27,25 +29,28 @@ class HtmlParser2017(IHtmlParser):
         return html.fragment_fromstring(header_str)
 
     @staticmethod
-    def get_course(file_string: str) -> str:
-        header = HtmlParser2017._get_header_from_file_data(file_string)
+    def is_header(element) -> bool:
+        return element.tag == 'div' and element.get('class') == 'title-page'
+
+    @staticmethod
+    def is_requests_table(element) -> bool:
+        return element.get('class') == \
+            'tablesaw tablesaw-stack tablesaw-sortable'
+
+    @staticmethod
+    def _get_course_from_header(header, decode=to_utf8) -> str:
         for item in header.getchildren()[1].getchildren():
-            caption = to_utf8(item.tail)
+            caption = decode(item.tail)
             if caption and 'Спеціальність' in caption:
                 return caption.replace('Спеціальність', '') \
                     .replace(':', '').strip()
         return ''
 
     @staticmethod
-    def get_type_of_education(file_string: str) -> str:
-        """
-        :param file_string: text of html page
-        :return: expected to be 'денна' or 'заочна'
-        """
-        header = HtmlParser2017._get_header_from_file_data(file_string)
+    def _get_type_of_education_from_header(header, decode=to_utf8) -> str:
         header_items = header.getchildren()[1].getchildren()
         for item in header_items:
-            caption = to_utf8(item.tail)
+            caption = decode(item.tail)
             try:
                 if caption is None:
                     continue
@@ -61,6 +66,50 @@ class HtmlParser2017(IHtmlParser):
             f'ERROR - Cannot find the type of education in\n{item_texts}\n')
         return ''
 
+    @staticmethod
+    def get_course(file_string: str) -> str:
+        header = HtmlParser2017._get_header_from_file_data(file_string)
+        return HtmlParser2017._get_course_from_header(header)
+
+    @staticmethod
+    def get_type_of_education(file_string: str) -> str:
+        """
+        :param file_string: text of html page
+        :return: expected to be 'денна' or 'заочна'
+        """
+        header = HtmlParser2017._get_header_from_file_data(file_string)
+        return HtmlParser2017._get_type_of_education_from_header(header)
+
+    @staticmethod
+    def parse_header(file_string: str) -> (str, str):
+        """
+        Parses header of the page once.
+        :param file_string: text of html page
+        :return: (course, type of education)
+        """
+        header = HtmlParser2017._get_header_from_file_data(file_string)
+        return HtmlParser2017._get_course_from_header(header), \
+            HtmlParser2017._get_type_of_education_from_header(header)
+
+    @staticmethod
+    def parse_header_element(header) -> (str, str):
+        """
+        Parses header element of the page which has been read as bytes
+        (see htmlparser.streaming), its text is already decoded.
+        :return: (course, type of education)
+        """
+        for element in header.iter():
+            if element.tail:
+                element.tail = element.tail.replace('\n', '') \
+                    .replace('\t', '')
+
+        def decode(text):
+            return text
+
+        return HtmlParser2017._get_course_from_header(header, decode), \
+            HtmlParser2017._get_type_of_education_from_header(
+                header, decode)
+
     @staticmethod
     def get_requests_from_page(file_string: str):
         """
@@ -199,16 +248,16 @@ class HtmlParser2017(IHtmlParser):
         return 0.0
 
     def get_region_coefficient(self) -> float:
-        return self.get_coefficient('РK')
+        return self.get_coefficient(self.COEFFICIENTS['РК'])
 
     def get_village_coefficient(self) -> float:
-        return self.get_coefficient('СK')
+        return self.get_coefficient(self.COEFFICIENTS['СК'])
 
     def get_area_coefficient(self) -> float:
-        return self.get_coefficient('ГK')
+        return self.get_coefficient(self.COEFFICIENTS['ГК'])
 
     def get_firstinqueue_coefficient(self) -> float:
-        return self.get_coefficient('ПК')
+        return self.get_coefficient(self.COEFFICIENTS['ПК'])
 
     def get_coefficients(self) -> {}:
         return {
@@ -225,3 +274,88 @@ class HtmlParser2017(IHtmlParser):
 
     def get_is_enrolled(self):
         return 'Зараховано' in self.title
+
+    @classmethod
+    def _parse_coefficients(cls, text: str) -> {}:
+        lines = text.split('\n')
+        result = {}
+        for key, coefficient in cls.COEFFICIENTS.items():
+            result[key] = 0.0
+            for line in lines:
+                if coefficient in line:
+                    value = line.replace(coefficient + ':', '')
+                    if '—' not in value:
+                        result[key] = float(value)
+                    break
+        return result
+
+    @classmethod
+    def extract_request(cls, row, record):
+        """
+        Single pass extractor: walks the row once and fills the record
+        with the same values as the getters of the parser.
+        :param row: html element of admission request (row of table)
+        :param record: AdmissionRequest2017 with common data for all
+        requests of the page, it is updated in place
+        :return: record
+        """
+        cells = row.getchildren()
+        n_columns = len(cells)
+
+        full_name = cells[1].text.strip()
+        names = full_name.split(' ')
+        record.full_name = full_name
+        record.last_name = names[0]
+        record.first_name = ' '.join(names[1:2])
+        record.middle_name = ' '.join(names[2:]).strip()
+
+        gov_exams, univ_exams = {}, {}
+        olymp_man, school_score = None, None
+        for details_score in cells[n_columns - 4][0]:
+            text = details_score.text
+            if text is None:
+                continue
+            is_exception = False
+            if 'ЗНО' in text:
+                is_exception = True
+                exam_name, score = text.replace('(ЗНО)', '') \
+                    .strip().rsplit(' ', 1)
+                gov_exams[exam_name.strip()] = float(score)
+            if cls.OLYMPIAD_OR_MAN_PARTICIPATOR in text:
+                is_exception = True
+                if olymp_man is None:
+                    olymp_man = float(text.replace(
+                        cls.OLYMPIAD_OR_MAN_PARTICIPATOR, '').strip())
+            if cls.EDUCATION_DOCUMENT in text:
+                is_exception = True
+                if school_score is None:
+                    school_score = float(text.replace(
+                        cls.EDUCATION_DOCUMENT, '').strip())
+            if is_exception or cls.WORLD_COMPETITION_PARTICIPATOR in text:
+                continue
+            name, score = text.strip().rsplit(' ', 1)
+            try:
+                univ_exams[name.strip()] = float(score)
+            except ValueError as e:
+                logger.error(e)
+                logger.error(f'ERROR - Failed to convert {score} to float')
+
+        record.extra_points = {'olymp_man': olymp_man or 0.0}
+        record.rank = int(cells[0].text)
+        record.school_score = school_score or 0.0
+        record.total_score = float(cells[n_columns - 5].text.strip())
+        record.gov_exams = gov_exams
+        record.priority = 0
+        if n_columns == cls.N_COLUMNS_WITH_PRIORITY:
+            priority = cells[3].text.strip()
+            record.priority = 0 if '—' in priority else int(priority)
+        record.univ_exams = univ_exams
+        record.coefficients = cls._parse_coefficients(
+            cells[n_columns - 3].text)
+        record.is_quota = '—' not in cells[n_columns - 2].text
+        record.is_original = cells[n_columns - 1].text.strip() == '+'
+        if cells[0].attrib['style'] == 'background:#fff':
+            record.is_enrolled = False
+        else:
+            record.is_enrolled = 'Зараховано' in row.attrib['title']
+        return record
@@ -1,4 +1,7 @@
 from bs4 import BeautifulSoup
+from lxml import html
+
+from data_parser.properties import PAGE_ENCODING
 
 
 # noinspection PyPep8Naming
@@ -8,6 +11,12 @@ class UNIV_FIELDS:
     ADDRESS = 'Адреса:'
 
 
+N_INFO_ROWS = 9
+MAX_CELLS_IN_COURSE_ROW = 9
+# parser of univ pages which are read as bytes
+PAGE_PARSER = html.HTMLParser(encoding=PAGE_ENCODING)
+
+
 def is_university_state_owned(title: str):
     return 'національн' in title.lower()
 
@@ -24,17 +33,9 @@ def get_univ_info_from_page_2017(univ_page):
 
     soup = BeautifulSoup(univ_page, 'html.parser')
     all_table_rows = soup.find_all('tr')
-    info_table = list(map(get_children, all_table_rows[:9]))
+    info_table = list(map(get_children, all_table_rows[:N_INFO_ROWS]))
     candidates = {key: value for key, value in info_table}
-    univ_title = candidates.get(UNIV_FIELDS.HEI_NAME, '')
-    is_state_owned = is_university_state_owned(univ_title)
-    univ_info = {
-        'univ_title': univ_title,
-        'univ_type': candidates.get(UNIV_FIELDS.HEI_TYPE, ''),
-        'univ_address': candidates.get(UNIV_FIELDS.ADDRESS, ''),
-        'is_state_owned': is_state_owned
-    }
-    return univ_info
+    return _get_univ_info(candidates)
 
 
 def find_area_and_course(current_values):
@@ -63,7 +64,7 @@ def get_area_course_info(univ_page):
         tag_children = list(tag.children)
         if not tag_children:
             return None
-        if len(tag_children) >= 9:
+        if len(tag_children) >= MAX_CELLS_IN_COURSE_ROW:
             return None
         area, course = find_area_and_course(tag_children[0].children)
         if area and course:
@@ -72,10 +73,57 @@ def get_area_course_info(univ_page):
     soup = BeautifulSoup(univ_page, 'html.parser')
     all_table_rows = soup.find_all('tr')
     area_courses = dict()
-    course_tables = list(filter(None, map(get_children, all_table_rows[9:])))
+    course_tables = list(filter(None, map(get_children, all_table_rows[N_INFO_ROWS:])))
     for key, value in course_tables:
         if key not in area_courses:
             area_courses[key] = list()
         if value not in area_courses[key]:
             area_courses[key].append(value)
     return area_courses
+
+
+def _get_univ_info(info: dict) -> dict:
+    univ_title = info.get(UNIV_FIELDS.HEI_NAME, '')
+    return {
+        'univ_title': univ_title,
+        'univ_type': info.get(UNIV_FIELDS.HEI_TYPE, ''),
+        'univ_address': info.get(UNIV_FIELDS.ADDRESS, ''),
+        'is_state_owned': is_university_state_owned(univ_title)
+    }
+
+
+def extract_univ_page(univ_page: bytes) -> (dict, dict):
+    """
+    Single pass extractor on lxml, the same as get_univ_info_from_page_2017
+    and get_area_course_info together, but the page is parsed once.
+    :param univ_page: html page of university
+    :return: (univ info, {area: [course, ...]})
+    """
+    rows = html.document_fromstring(univ_page, parser=PAGE_PARSER) \
+        .xpath('//tr')
+    info = {}
+    for row in rows[:N_INFO_ROWS]:
+        cells = row.getchildren()
+        if len(cells) == 1 and ':' in cells[0].text_content():
+            values = cells[0].text_content().split(':')
+            info[values[0] + ':'] = values[1].strip()
+        elif len(cells) == 2:
+            info[cells[0].text_content().strip()] = \
+                cells[1].text_content().strip()
+    area_courses = {}
+    for row in rows[N_INFO_ROWS:]:
+        cells = row.getchildren()
+        if not cells or len(cells) >= MAX_CELLS_IN_COURSE_ROW:
+            continue
+        area = cells[0].xpath('.//*[@title="Галузь"]')
+        course = cells[0].xpath('.//*[@title="Спеціальність"]')
+        if not area or not course:
+            continue
+        area = area[0].text_content().strip()
+        course = course[0].text_content().strip()
+        if not area or not course:
+            continue
+        courses = area_courses.setdefault(area, [])
+        if course not in courses:
+            courses.append(course)
+    return _get_univ_info(info), area_courses
@@ -0,0 +1,50 @@
+from lxml import etree
+
+from data_parser.properties import PAGE_ENCODING
+
+HEADER = 'header'
+ROW = 'row'
+
+
+def _release(element):
+    """
+    Frees memory of processed element and its preceding siblings.
+    """
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def iterparse_page(path: str, is_header, is_table=None):
+    """
+    Parses html page incrementally. Processed elements are cleared, so
+    memory does not grow with the size of the page.
+    Elements are valid only until the next one is yielded.
+    :param path: path to html file
+    :param is_header: function(element) -> bool, finds header of the page
+    :param is_table: function(element) -> bool, finds table with requests,
+    it is called with the table at the start of every body of a table,
+    rows of any table body are yielded if not set
+    :return: generator of (HEADER, element) and (ROW, element)
+    """
+    in_body = False
+    context = etree.iterparse(path, events=('start', 'end'), html=True,
+                              encoding=PAGE_ENCODING)
+    for event, element in context:
+        tag = element.tag
+        if event == 'start':
+            if tag == 'tbody':
+                in_body = is_table is None or is_table(element.getparent())
+            continue
+        if tag == 'tr':
+            if in_body:
+                yield ROW, element
+                _release(element)
+        elif tag == 'tbody':
+            in_body = False
+        elif is_header(element):
+            yield HEADER, element
+            _release(element)
+    del context
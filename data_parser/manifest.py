@@ -0,0 +1,93 @@
+import hashlib
+import os
+import time
+from typing import Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+MANIFEST_COLLECTION = 'ingest_manifest'
+HASH_BLOCK_SIZE = 1 << 20  # bytes
+
+
+def get_file_hash(path: str) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+class Manifest(object):
+    """
+    Collection of files which have been loaded to db: path, size, mtime,
+    content hash, number of records and version of parser.
+    A file is pending while its records are written and gets loaded only
+    after all of them have been written, so files of an interrupted run are
+    processed again and their records are replaced.
+    """
+
+    def __init__(self, db, year: int, parser_version: str):
+        self.collection = db[MANIFEST_COLLECTION]
+        self.year = year
+        self.parser_version = parser_version
+
+    def get_entries(self, paths: list) -> dict:
+        """
+        :return: {path: manifest entry} for paths which have been loaded
+        """
+        return {entry['_id']: entry
+                for entry in self.collection.find({'_id': {'$in': paths}})}
+
+    def check_file(self, path: str, entry: dict = None) -> Optional[dict]:
+        """
+        :param path: path to file
+        :param entry: manifest entry of the file if exists
+        :return: None if file is unchanged, information about the file
+        to store after loading alternatively
+        """
+        stat = os.stat(path)
+        info = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        is_loaded = entry is not None and not entry.get('pending') and \
+            entry['parser_version'] == self.parser_version
+        if is_loaded and entry['size'] == info['size'] and \
+                entry['mtime'] == info['mtime']:
+            return None
+        info['hash'] = get_file_hash(path)
+        if is_loaded and entry['hash'] == info['hash']:  # touched only
+            self.collection.update_one({'_id': path}, {'$set': info})
+            return None
+        return info
+
+    def mark_pending(self, paths: list):
+        """
+        Marks files which records are about to be written.
+        """
+        if not paths:
+            return
+        self.collection.bulk_write([
+            UpdateOne({'_id': path},
+                      {'$set': {'path': path, 'year': self.year,
+                                'pending': True}},
+                      upsert=True)
+            for path in paths], ordered=False)
+
+    def mark_loaded(self, files: list):
+        """
+        :param files: array of (path, file info, number of records)
+        """
+        if not files:
+            return
+        self.collection.bulk_write([
+            ReplaceOne({'_id': path},
+                       dict(info, path=path, records=records,
+                            year=self.year,
+                            parser_version=self.parser_version,
+                            loaded_at=time.time()),
+                       upsert=True)
+            for path, info, records in files], ordered=False)
+
+    def drop(self):
+        """
+        Forgets files of the year only, files of other years stay loaded.
+        """
+        self.collection.delete_many({'year': self.year})
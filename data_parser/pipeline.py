@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import os
+import time
+
+from data_parser.common import get_univ_id_and_list_id_from_filename
+from data_parser.manifest import Manifest
+from db.cube import build_cube
+from db.db import connect_to_database, create_bulk_writer
+from db.dictionary import Dictionary, COURSE
+from db.meta import bump_generation
+
+logger = logging.getLogger(__name__)
+
+# state of a pool process, see init_worker
+worker_db = None
+worker_writer = None
+worker_manifest = None
+worker_courses = None
+worker_process_file = None
+
+
+def init_worker(input_arguments, process_file, year: int,
+                parser_version: str):
+    """
+    Initializer of pool processes. Each process uses separate connection
+    to database and its own bulk writer.
+    :param input_arguments: arguments of data_parser CLI
+    :param process_file: function(path) -> list of dict
+    :param year: year of admission
+    :param parser_version: version of parser, files are reloaded if it
+    has been changed
+    """
+    global worker_db, worker_writer, worker_manifest, worker_courses, \
+        worker_process_file
+    worker_db = connect_to_database(input_arguments.db_host,
+                                    input_arguments.db)
+    worker_writer = create_bulk_writer(worker_db, input_arguments)
+    worker_manifest = Manifest(worker_db, year, parser_version)
+    worker_courses = Dictionary(worker_db, COURSE)
+    worker_courses.load()
+    worker_process_file = process_file
+
+
+def encode_course_ids(records: list, courses: Dictionary) -> list:
+    """
+    Parsers set titles of courses to course_id, they are replaced with
+    ids of dictionary (see db.dictionary) before records are written.
+    """
+    titles = {record['course_id'] for record in records
+              if isinstance(record['course_id'], str)}
+    if titles:
+        course_ids = courses.get_ids(titles, create=True)
+        for record in records:
+            if isinstance(record['course_id'], str):
+                record['course_id'] = course_ids[record['course_id']]
+    return records
+
+
+def process_files(paths: list) -> dict:
+    """
+    Task of a pool process: reads changed files, parses them and saves
+    results to db. Only paths are sent to the process.
+    :param paths: array of paths to html files with admission requests
+    :return: statistics of the task
+    """
+    inserted, failed = worker_writer.n_inserted, worker_writer.n_failed
+    entries = worker_manifest.get_entries(paths)
+    changed_files = []
+    for path in paths:
+        file_info = worker_manifest.check_file(path, entries.get(path))
+        if file_info is not None:
+            changed_files.append((path, file_info))
+    worker_manifest.mark_pending([path for path, _ in changed_files])
+    loaded_files = []
+    for path, file_info in changed_files:
+        result = encode_course_ids(worker_process_file(path) or [],
+                                   worker_courses)
+        # only files which were loaded (or pending) before have requests
+        if path in entries:
+            univ_id, list_id = get_univ_id_and_list_id_from_filename(
+                os.path.basename(path))
+            worker_db.requests.delete_many(
+                {'year': worker_manifest.year, 'univ_id': univ_id,
+                 'list_id': list_id})
+        worker_writer.extend(result)
+        loaded_files.append((path, file_info, len(result)))
+    worker_writer.flush()  # ensure everything is saved
+    # batches of writer mix records of files, so if any record is not
+    # written all files stay pending and are replaced by the next run
+    if worker_writer.n_failed == failed:
+        worker_manifest.mark_loaded(loaded_files)
+    else:
+        logger.warning(f'{worker_writer.n_failed - failed} records are not '
+                       f'written, {len(loaded_files)} files will be loaded '
+                       f'again')
+    return {'files': len(paths),
+            'skipped': len(paths) - len(loaded_files),
+            'inserted': worker_writer.n_inserted - inserted,
+            'failed': worker_writer.n_failed - failed}
+
+
+def get_files(path_to_data, is_list_file) -> list:
+    """
+    :param path_to_data: path to downloaded html files
+    :param is_list_file: function(file_name) -> bool
+    :return: array of paths to files with admission lists
+    """
+    return [os.path.join(subdir, x)
+            for subdir, _, files in os.walk(path_to_data)
+            for x in files if is_list_file(x)]
+
+
+def split_into_chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def start_ingest(input_arguments, process_file, is_list_file, year: int,
+                 parser_version: str):
+    """
+    Parses admission lists in parallel and writes results to db.
+    Files which are unchanged since the last run are skipped.
+    :param input_arguments: arguments of data_parser CLI
+    :param process_file: function(path) -> list of dict
+    :param is_list_file: function(file_name) -> bool
+    :param year: year of admission
+    :param parser_version: version of parser
+    """
+    if input_arguments.erase:
+        db = connect_to_database(input_arguments.db_host, input_arguments.db)
+        # requests of other years are kept
+        db.requests.delete_many({'year': year})
+        Manifest(db, year, parser_version).drop()
+    files = get_files(input_arguments.path, is_list_file)
+    print(f'Total files to process: {len(files)}')
+    print()
+    started_at = time.monotonic()
+    processed, skipped, inserted, failed = 0, 0, 0, 0
+    with multiprocessing.Pool(
+            input_arguments.workers, initializer=init_worker,
+            initargs=(input_arguments, process_file, year,
+                      parser_version)) as pool:
+        tasks = split_into_chunks(files, input_arguments.chunk_size)
+        for stats in pool.imap_unordered(process_files, tasks):
+            processed += stats['files']
+            skipped += stats['skipped']
+            inserted += stats['inserted']
+            failed += stats['failed']
+            print(f'Processed files: {processed}/{len(files)}')
+    seconds = time.monotonic() - started_at
+    db = connect_to_database(input_arguments.db_host, input_arguments.db)
+    if input_arguments.build_cube and failed:
+        # cube of partially loaded requests would hide the failure
+        logger.warning(f'Cube is not rebuilt: {failed} records failed')
+    elif input_arguments.build_cube:
+        build_cube(db)
+    bump_generation(db)
+    print(f'Skipped unchanged files: {skipped}')
+    print(f'Inserted: {inserted}, failed: {failed}, '
+          f'{inserted / seconds:.1f} docs/s')
+    print('exit')
@@ -1,7 +1,16 @@
+import os
+
 from utils import WINDOWS
 
-MAX_FILE_CACHE_SIZE = 2000  # per process
-FILE_CACHE_DELAY = 0.2  # seconds to wait
+FILES_PER_CHUNK = 50  # files sent to a worker at once
 NUM_RESULTS_TO_SAVE = 25 * 1000
+BULK_FLUSH_INTERVAL = 10.0  # seconds between writes of buffered results
 DB_CONNECTION_TIMEOUT = 10 * 1000  # ms
 FILE_ENCODING = 'windows-1251' if WINDOWS else 'utf-8'
+PAGE_ENCODING = 'utf-8'  # encoding of downloaded html files
+GEOCODING_API_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
+GEOCODING_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+GEOCODING_CACHE_PATH = 'geocoding_cache.sqlite3'
+GEOCODING_TIMEOUT = 10  # seconds
+GEOCODING_WORKERS = 4  # concurrent network lookups
+GEOCODING_RATE = 10.0  # max network lookups per second
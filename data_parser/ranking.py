@@ -0,0 +1,44 @@
+from src.model import PART_TOP_FIELDS
+
+# score fields which are ranked for each type of top applicants
+RANKED_FIELDS = {'overall': 'total_score',
+                 'gov_exams': 'zno_score',
+                 'school_score': 'school_score'}
+
+
+def get_zno_score(gov_exams: dict) -> float:
+    """
+    Average score of government exams (ЗНО).
+    :param gov_exams: {exam_name: score}
+    :return: 0.0 if there are no valid exam scores
+    """
+    scores = []
+    for value in gov_exams.values():
+        try:
+            scores.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def set_percentile_ranks(requests: list) -> list:
+    """
+    Calculates percentile ranks of applicants within one admission list
+    (one page: year, course and list are the same for all requests).
+    Rank is a percent of applicants with a strictly higher score, so
+    "top N% applicants" is a range query: rank < N.
+    :param requests: array of dict of requests from one list
+    :return: the same array with zno_score and top_* fields set
+    """
+    total = len(requests)
+    for request in requests:
+        request['zno_score'] = get_zno_score(request['gov_exams'])
+    for top_type, field in RANKED_FIELDS.items():
+        rank_field = PART_TOP_FIELDS[top_type]
+        ordered = sorted(requests, key=lambda x: x[field], reverse=True)
+        position, previous_score = 0, None
+        for i, request in enumerate(ordered):
+            if request[field] != previous_score:
+                position, previous_score = i, request[field]
+            request[rank_field] = round(100.0 * position / total, 2)
+    return requests
@@ -1,29 +1,26 @@
 import logging
 import multiprocessing
 import os
-import queue
-import threading
 from re import sub
 from typing import Optional
 
-import requests
-
 from data_parser.AdmissionRequest import AbstractAdmissionRequest, \
     AdmissionRequest2017
-from data_parser.InputArgumentParser import create_input_argument_parser
+from data_parser.common import get_univ_id_and_list_id_from_filename
+from data_parser.geocoding import Geocoder
 from data_parser.htmlparser.htmlparser2017 import HtmlParser2017
-from data_parser.properties import MAX_FILE_CACHE_SIZE, FILE_ENCODING, \
-    FILE_CACHE_DELAY, NUM_RESULTS_TO_SAVE
-from db.db import connect_to_database, save_results_to_db
-from htmlparser.htmlunivparser import get_univ_info_from_page_2017, \
-    get_area_course_info
-from utils import generate_id
+from data_parser.htmlparser.streaming import iterparse_page, HEADER
+from data_parser.properties import FILE_ENCODING
+from data_parser.ranking import set_percentile_ranks
+from db.db import connect_to_database
+from db.dictionary import AREA, COURSE, Dictionary
+from db.meta import bump_generation
+from data_parser.htmlparser.htmlunivparser import extract_univ_page
 
 logger = logging.getLogger(__name__)
 
-
-def get_univ_id_and_list_id_from_filename(file_name: str):
-    return list(map(int, file_name[file_name.rindex('i') + 1:-5].split('p')))
+YEAR = 2017
+PARSER_VERSION = '2017.1'
 
 
 def create_request_dictionary_from_raw_data(
@@ -50,141 +47,108 @@ def create_request_dictionary_from_raw_data(
             f'i{processed_request.univ_id}p{processed_request.list_id}')
         logger.error(e)
         return None
-    return vars(processed_request)
+    return processed_request.to_document()
+
+
+def create_request(
+        row, base_request: AbstractAdmissionRequest
+) -> Optional[AdmissionRequest2017]:
+    """
+    Same as create_request_dictionary_from_raw_data, but the row is
+    walked once by single pass extractor and the result is a record.
+    :param row: html row of applicant's admission request
+    :param base_request: request object with common data for all requests
+    """
+    try:
+        return HtmlParser2017.extract_request(
+            row, AdmissionRequest2017(base_request))
+    except Exception as e:
+        logger.error(f'i{base_request.univ_id}p{base_request.list_id}')
+        logger.error(e)
+        return None
 
 
 def process_admission_requests(
         requests: [], base_request: AbstractAdmissionRequest) -> list:
     """
-    Convert html rows of admission requests to dictionaries
+    Convert html rows of admission requests to records
     :param requests: array of str rows of applicant's admission requests
     :param base_request: request object with common data for all requests
-    :return: array of dict of requests
+    :return: array of AdmissionRequest2017
     """
     request_dao = [
-        create_request_dictionary_from_raw_data(request, base_request)
+        create_request(request, base_request)
         for request in requests if request.getchildren()]
     return list(filter(None, request_dao))
 
 
-def get_common_info_and_create_base_request(
-        file_name: str,
-        file_string: str) -> Optional[AbstractAdmissionRequest]:
+def create_base_request(
+        file_name: str, course_name: str, type_of_education: str,
+        year: int = YEAR) -> Optional[AbstractAdmissionRequest]:
     univ_id, list_id = get_univ_id_and_list_id_from_filename(file_name)
-    course_name = HtmlParser2017.get_course(file_string)
-    course_id = generate_id(course_name)
-    type_of_education = HtmlParser2017.get_type_of_education(file_string)
-    if type_of_education is '':
+    if type_of_education == '':
         return
     # if both False - education type is 'дистанційна'
     is_denna = 'денна' in type_of_education or 'вечірня' in type_of_education
     is_zaochna = 'заочна' in type_of_education
+    # title is replaced with id of course by data_parser.pipeline
     return AbstractAdmissionRequest(
-        univ_id, list_id, is_denna, is_zaochna, course_id)
+        univ_id, list_id, is_denna, is_zaochna, course_name, year)
+
+
+def get_common_info_and_create_base_request(
+        file_name: str, file_string: str,
+        year: int = YEAR) -> Optional[AbstractAdmissionRequest]:
+    course_name, type_of_education = HtmlParser2017.parse_header(file_string)
+    return create_base_request(file_name, course_name, type_of_education,
+                               year)
 
 
-def process_page_with_admission_requests(file_name: str, file_string: str):
+def process_page_with_admission_requests(file_name: str, file_string: str,
+                                         year: int = YEAR):
     base_request = get_common_info_and_create_base_request(
-        file_name, file_string)
+        file_name, file_string, year)
     if base_request is None:
         return list()
     requests_body = HtmlParser2017.get_requests_from_page(file_string)
-    return process_admission_requests(requests_body, base_request)
+    return set_percentile_ranks(
+        process_admission_requests(requests_body, base_request))
 
 
-def main_worker(files_cache, is_all_files_read, input_arguments):
-    db = connect_to_database(input_arguments.db_host, input_arguments.db)
+def process_file_with_admission_requests(path: str,
+                                         year: int = YEAR) -> list:
+    with open(path, encoding=FILE_ENCODING) as source:
+        file_string = source.read()
+    return process_page_with_admission_requests(
+        os.path.basename(path), file_string, year)
+
+
+def stream_file_with_admission_requests(path: str,
+                                        year: int = YEAR) -> list:
+    """
+    Streaming mode: the page is parsed incrementally, so only one row of
+    the table is kept in memory at a time.
+    :param path: path to html file with admission requests
+    :param year: year of admission
+    :return: array of AdmissionRequest2017
+    """
+    base_request = None
     results = []
-    while not is_all_files_read.is_set() or not files_cache.empty():
-        try:
-            filename, file_string = files_cache.get(timeout=FILE_CACHE_DELAY)
-        except queue.Empty:
-            continue
-        result = process_page_with_admission_requests(filename, file_string)
-        if result is None or len(result) == 0:
-            continue
-        for r in result:
-            logger.info(r)
-        results.extend(result)
-        if len(results) > NUM_RESULTS_TO_SAVE:
-            save_results_to_db(db, results)
-            results = []
-    if results:  # ensure everything is saved
-        save_results_to_db(db, results)
-
-
-def create_queues():
-    manager = multiprocessing.Manager()
-    files_to_read_queue = manager.Queue()  # queue with inputs
-    file_cache = manager.Queue()  # file cache
-    is_all_files_read = manager.Event()
-    return files_to_read_queue, file_cache, is_all_files_read
-
-
-def add_files_to_queue(path_to_data, files_to_read):
-    for subdir in os.walk(path_to_data):
-        files = subdir[-1]
-        for x in files:
-            if 'p' in x and '.html' in x:
-                files_to_read.put((subdir[0], x))
-
-
-def read_data_from_files_and_add_to_file_cache(
-        files_to_read_queue: multiprocessing.Queue,
-        file_cache: multiprocessing.Queue):
-    while not files_to_read_queue.empty() and \
-            file_cache.qsize() < MAX_FILE_CACHE_SIZE:
-        try:
-            file_path = files_to_read_queue.get_nowait()  # get path to file
-        except queue.Empty:
-            break  # error getting path, no files left or we should wait
-        path = os.path.join(*file_path)
-        with open(path, encoding=FILE_ENCODING) as source:  # and read it
-            file_data = source.read()
-        # store contents in cache
-        file_cache.put((os.path.basename(path), file_data))
-
-
-def read_data_from_files(
-        files_to_read_queue: multiprocessing.Queue,
-        file_cache: multiprocessing.Queue,
-        is_all_files_read: multiprocessing.Event):
-    read_data_from_files_and_add_to_file_cache(files_to_read_queue, file_cache)
-    if not files_to_read_queue.empty():  # wait and repeat
-        start_reading_data_with_delay_in_thread(files_to_read_queue,
-                                                file_cache,
-                                                is_all_files_read,
-                                                FILE_CACHE_DELAY)
-    else:  # no files left
-        print('stop reading')
-        is_all_files_read.set()
-
-
-def start_reading_data_with_delay_in_thread(
-        files_to_read_queue: multiprocessing.Queue,
-        file_cache: multiprocessing.Queue,
-        are_files_read: multiprocessing.Event,
-        delay: float = 0.0):
-    t = threading.Timer(delay, read_data_from_files,
-                        args=(files_to_read_queue, file_cache, are_files_read))
-    t.start()
-
-
-def start_parsing_pages_and_write_result_to_database(input_arguments):
-    if input_arguments.erase:
-        db = connect_to_database(input_arguments.db_host, input_arguments.db)
-        db.requests.drop()
-    path_to_data = input_arguments.path
-    files_to_read_queue, file_cache, is_all_files_read = create_queues()
-    add_files_to_queue(path_to_data, files_to_read_queue)
-    read_data_from_files(files_to_read_queue, file_cache, is_all_files_read)
-    print(f'Total files to process: {files_to_read_queue.qsize()}')
-    print()
-    pool = multiprocessing.Pool(input_arguments.workers)  # create pool
-    pool.starmap(main_worker,
-                 [(file_cache, is_all_files_read, input_arguments)] *
-                 input_arguments.workers)  # and process queue using pool
-    print('exit')
+    for kind, element in iterparse_page(path, HtmlParser2017.is_header,
+                                        HtmlParser2017.is_requests_table):
+        if kind == HEADER:
+            base_request = create_base_request(
+                os.path.basename(path),
+                *HtmlParser2017.parse_header_element(element), year)
+            if base_request is None:
+                return list()
+        elif base_request is not None and element.getchildren():
+            results.append(create_request(element, base_request))
+    return set_percentile_ranks(list(filter(None, results)))
+
+
+def is_list_file(file_name: str) -> bool:
+    return 'p' in file_name and '.html' in file_name
 
 
 def get_univ_files(data_path) -> list:
@@ -197,102 +161,86 @@ def get_univ_files(data_path) -> list:
             and 'o' not in x]
 
 
-def get_city_name_from_address(address):
-    key = ''
-    google_maps_api_url = \
-        "https://maps.googleapis.com/maps/api/geocode/json?address=" + \
-        address.replace(' ', "+") + \
-        "&language=uk&sensor=false&region=uk&key=" + key
-    req = requests.get(google_maps_api_url)
-    res = req.json()
-    try:
-        result = res['results'][0]
-        for address_component in result['address_components']:
-            if ('administrative_area_level_1' in address_component['types']) \
-                    and ('political' in address_component['types']):
-                # here our city name - however we need to tes
-                return address_component['long_name']
-
-        for address_component in result['address_components']:
-            if ('administrative_area_level_2' in address_component['types']) \
-                    and ('political' in address_component['types']):
-                # here our city name - however we need to tes
-                return address_component['long_name']
-    except Exception as e:
-        print(e)
-        print(address)
-        return ''
+def clean_univ_title(title: str) -> str:
+    title = sub(r'\([^)]*\)', '', title.strip())
+    while '  ' in title:
+        title = title.replace('  ', ' ')
+    return title
 
 
-def parse_univ_pages_and_write_to_database(input_arguments):
+def extract_univ_file(path: str) -> (dict, dict):
+    """
+    Parses page of university once. CPU intensive work, runs in workers.
+    :return: (univ, {area: [course, ...]})
+    """
+    with open(path, 'rb') as file:
+        univ, area_courses = extract_univ_page(file.read())
+    univ['univ_title'] = clean_univ_title(univ['univ_title'])
+    univ['univ_id'] = int(path[path.rindex('i') + 1:-5])
+    return univ, area_courses
+
+
+def load_univ_pages(input_arguments, load_univs: bool = True,
+                    load_areas: bool = True):
+    """
+    Parses pages of universities on a process pool and writes universities,
+    knowledge areas and courses found in them. Regions of universities are
+    resolved offline (see data_parser.geocoding), by Google Geocoding API
+    only with --geocode-online.
+    """
     db = connect_to_database(input_arguments.db_host, input_arguments.db)
     if input_arguments.erase:
-        db.univs.drop()
+        if load_univs:
+            db.univs.drop()
+        if load_areas:
+            db.areas.drop()
+            db.courses.drop()
     html_univ_files = get_univ_files(input_arguments.path)
     univs_to_insert = dict()
-    for univ_file in html_univ_files:
-        with open(univ_file, 'rb') as file:
-            q = file.read()
-        univ = get_univ_info_from_page_2017(q)
-
-        # tlower = univ['univ_title'].lower()
-        # if 'коледж' in tlower or 'технікум' in tlower or 'училищ' in tlower:
-        #     continue
-
-        univ['univ_title'] = sub(r'\([^)]*\)', '', univ['univ_title'].strip())
-        while '  ' in univ['univ_title']:
-            univ['univ_title'] = univ['univ_title'].replace('  ', ' ')
+    areas = dict()
+    with multiprocessing.Pool(input_arguments.workers) as pool:
+        for univ, local_areas in pool.imap(
+                extract_univ_file, html_univ_files,
+                chunksize=input_arguments.chunk_size):
+            if load_univs:
+                univs_to_insert[univ['univ_id']] = univ
+            for key, value in local_areas.items():
+                courses = areas.setdefault(key, [])
+                courses.extend(c for c in value if c not in courses)
+    if load_univs and univs_to_insert:
+        geocoder = Geocoder(
+            input_arguments.geocoding_cache,
+            input_arguments.geocoding_key
+            if input_arguments.geocode_online else None,
+            input_arguments.geocoding_workers,
+            input_arguments.geocoding_rate)
+        try:
+            regions = geocoder.resolve_many(
+                [univ['univ_address'] for univ in univs_to_insert.values()])
+        finally:
+            geocoder.close()
+        for univ in univs_to_insert.values():
+            univ['univ_location'] = regions[univ['univ_address']]
+        db.univs.insert_many(univs_to_insert.values())
+    if load_areas and areas:
+        area_ids = Dictionary(db, AREA).get_ids(list(areas), create=True)
+        course_ids = Dictionary(db, COURSE).get_ids(
+            list({course for courses in areas.values()
+                  for course in courses}), create=True)
+        db.areas.insert_many(
+            [{'area_id': area_ids[title], 'area_title': title}
+             for title in areas.keys()])
+        db.courses.insert_many(
+            [{'area_id': area_ids[title], 'course_id': course_ids[course],
+              'course_title': course}
+             for title, course_list in areas.items()
+             for course in course_list])
+    bump_generation(db)
 
-        univ['univ_location'] = get_city_name_from_address(
-            univ['univ_address'])
-        # generate_id(univ['univ_title'])
-        univ['univ_id'] = int(univ_file[univ_file.rindex('i') + 1:-5])
 
-        univs_to_insert[univ['univ_id']] = univ
-        if len(univs_to_insert) % 10 == 0:
-            print(len(univs_to_insert))
-    db.univs.insert_many(univs_to_insert.values())
+def parse_univ_pages_and_write_to_database(input_arguments):
+    load_univ_pages(input_arguments, load_areas=False)
 
 
 def parse_areas_of_study_and_write_to_database(input_arguments):
-    db = connect_to_database(input_arguments.db_host, input_arguments.db)
-    if input_arguments.erase:
-        db.areas.drop()
-        db.courses.drop()
-    html_univ_files = get_univ_files(input_arguments.path)
-    areas = dict()
-    for univ_file in html_univ_files:
-        with open(univ_file, 'rb') as file:
-            q = file.read()
-        local_areas = get_area_course_info(q)
-        for key, value in local_areas.items():
-            if key not in areas:
-                areas[key] = list()
-            for course in value:
-                if course not in areas[key]:
-                    areas[key].append(course)
-    print(areas)
-    areas_dao = [{'area_id_old': generate_id(title), 'area_title': title}
-                 for title in areas.keys()]
-    courses_dao = list()
-    for title, course_list in areas.items():
-        curr_courses = [{'area_id_old': generate_id(title), 'course_title': c}
-                        for c in course_list]
-        courses_dao.extend(curr_courses)
-    db.areas.insert_many(areas_dao)
-    db.courses.insert_many(courses_dao)
-
-
-if __name__ == '__main__':
-    file_handler = logging.FileHandler('requests.log')
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.DEBUG)
-    with open('errors.txt', 'w+')as f:
-        f.write('')
-    parser = create_input_argument_parser()
-    args = parser.parse_args()
-    # universities, area, courses
-    parse_univ_pages_and_write_to_database(args)
-    # parse_areas_of_study_and_write_to_database(args)
-    # requests
-    # start_parsing_pages_and_write_result_to_database(args)
+    load_univ_pages(input_arguments, load_univs=False)
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # analytics engine is optional
+    np = None
+
+from db.histogram import SCORE_PRECISION
+from db.meta import get_generation
+from src.logger import configure_logger
+from src.model import PART_TOP_FIELDS
+
+logger = logging.getLogger(__name__)
+logger = configure_logger(logger)
+
+SCORE_FIELDS = ['total_score', 'school_score', 'zno_score'] + \
+               list(PART_TOP_FIELDS.values())
+MISSING_YEAR = -1
+
+
+class ColumnarAnalytics(object):
+    """
+    In-process copy of requests collection stored as column arrays.
+    Answers queries of DBPool._build_requests_query shape with vectorized
+    group by university, without touching the database.
+    Columns are reloaded when generation of data is changed (see db.meta).
+    """
+
+    def __init__(self, db, refresh_interval: float):
+        if np is None:
+            raise RuntimeError('numpy is required for analytics engine')
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.generation = None
+        self.checked_at = 0.0
+        self.columns = None
+        self.course_codes = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        started_at = time.monotonic()
+        generation = get_generation(self.db)
+        projection = dict.fromkeys(
+            ['univ_id', 'course_id', 'year', 'is_enrolled'] + SCORE_FIELDS, 1)
+        projection['_id'] = 0
+        values = {key: [] for key in projection if key != '_id'}
+        course_codes = {}
+        for request in self.db.requests.find({}, projection):
+            values['univ_id'].append(request['univ_id'])
+            values['course_id'].append(course_codes.setdefault(
+                request.get('course_id'), len(course_codes)))
+            values['year'].append(request.get('year') or MISSING_YEAR)
+            values['is_enrolled'].append(request.get('is_enrolled', False))
+            for field in SCORE_FIELDS:
+                value = request.get(field)
+                values[field].append(np.nan if value is None else value)
+        columns = {
+            'univ_id': np.array(values['univ_id'], dtype=np.int64),
+            'course_id': np.array(values['course_id'], dtype=np.int32),
+            'year': np.array(values['year'], dtype=np.int16),
+            'is_enrolled': np.array(values['is_enrolled'], dtype=bool)}
+        for field in SCORE_FIELDS:
+            columns[field] = np.array(values[field], dtype=np.float64)
+        # replace all at once, queries may run in other threads
+        self.columns, self.course_codes = columns, course_codes
+        self.generation = generation
+        logger.info(f'Analytics: loaded {len(columns["univ_id"])} requests '
+                    f'in {time.monotonic() - started_at:.1f}s')
+
+    def refresh_if_needed(self):
+        if time.monotonic() - self.checked_at < self.refresh_interval:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < self.refresh_interval:
+                return
+            if self.columns is None or \
+                    get_generation(self.db) != self.generation:
+                self.load()
+            self.checked_at = time.monotonic()
+
+    def _get_mask(self, query: dict):
+        """
+        :param query: query of DBPool._build_requests_query
+        :return: boolean array of requests matching the query
+        """
+        columns = self.columns
+        mask = np.ones(len(columns['univ_id']), dtype=bool)
+        for field, condition in query.items():
+            if field == 'course_id':
+                codes = [self.course_codes[x] for x in condition['$in']
+                         if x in self.course_codes]
+                mask &= np.isin(columns[field], codes)
+            elif isinstance(condition, dict) and '$in' in condition:
+                mask &= np.isin(columns[field], condition['$in'])
+            elif isinstance(condition, dict) and '$lt' in condition:
+                mask &= columns[field] < condition['$lt']
+            else:
+                mask &= columns[field] == condition
+        return mask
+
+    def get_statistics(self, query: dict, average_fields: dict) -> list:
+        """
+        Same statistics as DBPool.get_analytics_by_filter calculates, but
+        without university info.
+        :param query: query of DBPool._build_requests_query
+        :param average_fields: {label: field} to calculate averages for
+        :return: array of rows, one per university
+        """
+        self.refresh_if_needed()
+        columns = self.columns
+        mask = self._get_mask(query)
+        univ_ids, groups = np.unique(columns['univ_id'][mask],
+                                     return_inverse=True)
+        n_groups = len(univ_ids)
+        counts = np.bincount(groups, minlength=n_groups)
+        total_scores = columns['total_score'][mask]
+
+        is_enrolled = columns['is_enrolled'][mask]
+        passing_scores = np.full(n_groups, np.inf)
+        np.fmin.at(passing_scores, groups[is_enrolled],
+                   total_scores[is_enrolled])
+
+        averages = {}
+        for label, field in average_fields.items():
+            values = columns[field][mask]
+            is_valid = ~np.isnan(values)
+            sums = np.bincount(groups[is_valid], weights=values[is_valid],
+                               minlength=n_groups)
+            n_values = np.bincount(groups[is_valid], minlength=n_groups)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                averages[label] = sums / n_values
+
+        # distribution of scores, the same as aggregation of DBPool collects
+        keys = np.trunc(total_scores * SCORE_PRECISION)
+        is_scored = ~np.isnan(keys)
+        pairs, pair_counts = np.unique(
+            np.stack([groups[is_scored], keys[is_scored]], axis=1),
+            axis=0, return_counts=True)
+        bounds = np.searchsorted(pairs[:, 0], np.arange(n_groups + 1))
+
+        rows = []
+        for i, univ_id in enumerate(univ_ids.tolist()):
+            row = {'univ_id': univ_id, 'count': int(counts[i]),
+                   'score_distribution': [
+                       {'score': key, 'count': count} for key, count in zip(
+                           pairs[bounds[i]:bounds[i + 1], 1].tolist(),
+                           pair_counts[bounds[i]:bounds[i + 1]].tolist())],
+                   'passing_overall_score':
+                       None if np.isinf(passing_scores[i])
+                       else float(passing_scores[i])}
+            for label, values in averages.items():
+                row[label] = None if np.isnan(values[i]) \
+                    else float(values[i])
+            rows.append(row)
+        return rows
@@ -0,0 +1,113 @@
+"""
+Requests rolled up into cells of (univ_id, course_id, year, is_enrolled).
+Filters resolve knowledge areas to courses and regions to universities, so
+any filter without part of top applicants selects whole cells.
+
+python -m db.cube --db ispyt --host localhost
+"""
+import argparse
+import logging
+import time
+
+from pymongo import MongoClient
+
+from db.histogram import get_score_key
+from db.indexes import INDEXES
+from src.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+logger = configure_logger(logger)
+
+CUBE_COLLECTION = 'requests_cube'
+CUBE_KEYS = ['univ_id', 'course_id', 'year', 'is_enrolled']
+# fields which sums and numbers of values are stored for
+CUBE_FIELDS = ['total_score', 'school_score', 'zno_score']
+
+
+def build_cube(db) -> int:
+    """
+    Rebuilds cube from requests collection. New cube replaces the old one
+    at once, so readers never see a partial cube.
+    :param db: active connection to db
+    :return: number of cells
+    """
+    started_at = time.monotonic()
+    cell_id = {key: f'${key}' for key in CUBE_KEYS}
+    score_group = {
+        '_id': dict(cell_id, score=get_score_key('$total_score')),
+        'count': {'$sum': 1},
+        'passing_overall_score': {'$min': {
+            '$cond': ['$is_enrolled', '$total_score', None]}}}
+    cell_group = {
+        '_id': {key: f'$_id.{key}' for key in CUBE_KEYS},
+        'count': {'$sum': '$count'},
+        'passing_overall_score': {'$min': '$passing_overall_score'},
+        'score_distribution': {'$push': {'score': '$_id.score',
+                                         'count': '$count'}}}
+    project = {key: f'$_id.{key}' for key in CUBE_KEYS}
+    project.update({'_id': 0, 'count': 1, 'passing_overall_score': 1,
+                    'score_distribution': 1})
+    for field in CUBE_FIELDS:
+        score_group[f'{field}_sum'] = {'$sum': f'${field}'}
+        score_group[f'{field}_n'] = {'$sum': {
+            '$cond': [{'$gt': [f'${field}', None]}, 1, 0]}}
+        cell_group[f'{field}_sum'] = {'$sum': f'${field}_sum'}
+        cell_group[f'{field}_n'] = {'$sum': f'${field}_n'}
+        project[f'{field}_sum'] = 1
+        project[f'{field}_n'] = 1
+    new_collection = f'{CUBE_COLLECTION}_new'
+    db.requests.aggregate([
+        {'$group': score_group}, {'$group': cell_group},
+        {'$project': project}, {'$out': new_collection}],
+        allowDiskUse=True)
+    for keys in INDEXES[CUBE_COLLECTION]:
+        db[new_collection].create_index(keys)
+    db[new_collection].rename(CUBE_COLLECTION, dropTarget=True)
+    n_cells = db[CUBE_COLLECTION].estimated_document_count()
+    logger.info(f'Cube: built {n_cells} cells in '
+                f'{time.monotonic() - started_at:.1f}s')
+    return n_cells
+
+
+def get_cube_statistics_stages(average_fields: dict) -> list:
+    """
+    Merges cells into (university, score) groups, like the first step of
+    DBPool._get_statistics_stages does with requests. Totals of cell are
+    taken from its first score only, so they are not multiplied by $unwind.
+    :param average_fields: {label: field}, fields must be in CUBE_FIELDS
+    :return: stages of aggregation pipeline
+    """
+    def first(value: str) -> dict:
+        # index is null for cells without scores
+        return {'$cond': [{'$lte': ['$score_index', 0]}, value, None]}
+
+    score_group = {
+        '_id': {'univ_id': '$univ_id',
+                'score': '$score_distribution.score'},
+        'score_count': {'$sum': '$score_distribution.count'},
+        'count': {'$sum': first('$count')},
+        'passing_overall_score': {'$min': first('$passing_overall_score')}}
+    for label, field in average_fields.items():
+        score_group[f'{label}_sum'] = {'$sum': first(f'${field}_sum')}
+        score_group[f'{label}_n'] = {'$sum': first(f'${field}_n')}
+    return [{'$unwind': {'path': '$score_distribution',
+                         'includeArrayIndex': 'score_index',
+                         'preserveNullAndEmptyArrays': True}},
+            {'$group': score_group}]
+
+
+def can_use_cube(query: dict, average_fields: dict) -> bool:
+    """
+    :param query: query of DBPool._build_requests_query
+    """
+    return set(query) <= set(CUBE_KEYS) and \
+        set(average_fields.values()) <= set(CUBE_FIELDS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Rebuild cube of admission requests')
+    parser.add_argument('--db', default='ispyt')
+    parser.add_argument('--host', default='localhost')
+    args = parser.parse_args()
+    print(f'Cells: {build_cube(MongoClient(args.host)[args.db])}')
@@ -1,13 +1,25 @@
 import logging
-from functools import lru_cache
+import time
 from itertools import chain
 
-from pymongo import MongoClient
-
-from data_parser.properties import DB_CONNECTION_TIMEOUT
+from bson import BSON
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, WriteConcern
+from pymongo.errors import BulkWriteError
+
+from data_parser.properties import DB_CONNECTION_TIMEOUT, \
+    NUM_RESULTS_TO_SAVE, BULK_FLUSH_INTERVAL
+from db.analytics import ColumnarAnalytics
+from db.cube import CUBE_COLLECTION, can_use_cube, \
+    get_cube_statistics_stages
+from db.dimensions import DimensionCache
+from db.histogram import get_score_key, summarize_scores
+from db.indexes import verify_indexes
+from db.meta import get_generation
+from src.exceptions import QueryPlanError
 from src.logger import configure_logger
-from src.model import Filter
-from utils import generate_id, decode_id
+from src.metrics import STAGE_SECONDS
+from src.model import Filter, PART_TOP_FIELDS, DEFAULT_PART_TOP_TYPE
 
 logger = logging.getLogger(__name__)
 logger = configure_logger(logger)
@@ -22,38 +34,177 @@ def connect_to_database(hostname, database):
         .get_database(database)
 
 
+def create_write_concern(value: str = None) -> WriteConcern:
+    """
+    :param value: number of nodes to acknowledge write or 'majority',
+    server default if not set
+    """
+    if value is None:
+        return WriteConcern()
+    return WriteConcern(w=int(value) if value.isdigit() else value)
+
+
+class BulkWriter(object):
+    """
+    Buffers documents and writes them with unordered bulk inserts.
+    Buffer is flushed when it reaches batch size or when flush interval
+    has passed since the last flush.
+    """
+
+    def __init__(self, collection, batch_size: int = NUM_RESULTS_TO_SAVE,
+                 flush_interval: float = BULK_FLUSH_INTERVAL,
+                 write_concern: WriteConcern = None):
+        if write_concern is not None:
+            collection = collection.with_options(write_concern=write_concern)
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.n_inserted = 0
+        self.n_failed = 0
+        self.started_at = time.monotonic()
+        self.flushed_at = self.started_at
+
+    def add(self, document):
+        self.buffer.append(self._encode(document))
+        self._flush_if_needed()
+
+    def extend(self, documents: list):
+        self.buffer.extend(map(self._encode, documents))
+        self._flush_if_needed()
+
+    @staticmethod
+    def _encode(document) -> RawBSONDocument:
+        """
+        :param document: dict, RawBSONDocument or record with to_bson
+        (see data_parser.AdmissionRequest)
+        """
+        if isinstance(document, RawBSONDocument):
+            return document
+        if isinstance(document, dict):
+            # keys are not checked, exam names may contain dots
+            return RawBSONDocument(BSON.encode(document))
+        return document.to_bson()
+
+    def _flush_if_needed(self):
+        if len(self.buffer) >= self.batch_size or \
+                time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        documents, self.buffer = self.buffer, []
+        self.flushed_at = time.monotonic()
+        for i in range(0, len(documents), self.batch_size):
+            self._insert(documents[i:i + self.batch_size])
+
+    def _insert(self, documents: list):
+        try:
+            self.collection.insert_many(documents, ordered=False)
+            self.n_inserted += len(documents)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            self.n_inserted += e.details.get('nInserted', 0)
+            self.n_failed += len(documents) - e.details.get('nInserted', 0)
+            for error in errors:
+                logger.error(error.get('errmsg'))
+                logger.error(f'Failed to write data: '
+                             f'{dict(documents[error["index"]])}')
+
+    def close(self) -> dict:
+        """
+        Flushes buffered documents.
+        :return: statistics of writes
+        """
+        self.flush()
+        seconds = time.monotonic() - self.started_at
+        stats = {'inserted': self.n_inserted, 'failed': self.n_failed,
+                 'seconds': seconds,
+                 'docs_per_second': self.n_inserted / seconds
+                 if seconds else 0.0}
+        logger.info(f'Bulk write: {stats}')
+        return stats
+
+
+def create_bulk_writer(db, input_arguments) -> BulkWriter:
+    """
+    :param db: active connection to db
+    :param input_arguments: arguments of data_parser CLI
+    """
+    return BulkWriter(
+        db.requests, input_arguments.batch_size,
+        input_arguments.flush_interval,
+        create_write_concern(input_arguments.write_concern))
+
+
 def save_results_to_db(db, results):
     """
     Saves data after processing to db.
     :param db: active connection to db
     :param results: list
+    :return: statistics of writes
     """
-    for result in results:
-        try:
-            db.requests.insert(result, check_keys=False)
-        except Exception as e:
-            logger.error(e)
-            logger.error(f'Failed to write data: {result}')
+    writer = BulkWriter(db.requests)
+    writer.extend(results)
+    return writer.close()
 
 
 class DBPool(object):
-    def __init__(self, host, port):
+    def __init__(self, host, port, client_options: dict = None):
+        """
+        :param client_options: keyword arguments of MongoClient (pool size,
+        timeouts, read preference)
+        """
         self.host = host
         self.port = port
+        self.client_options = client_options or {}
         self.db = None
         self.requests = None
-
-    def connect(self, database: str):
-        client = MongoClient(self.host, self.port)
+        self.analytics = None
+        self.dimensions = None
+        self.use_cube = False
+
+    def connect(self, database: str,
+                dimensions_refresh_interval: float = 60,
+                check_indexes: bool = False):
+        """
+        :param check_indexes: verify that hot queries use indexes, which
+        are created by data_parser (see db.indexes)
+        :raises QueryPlanError: if check_indexes and a query plan falls
+        back to COLLSCAN
+        """
+        client = MongoClient(self.host, self.port, **self.client_options)
         self.db = client[database]
         self.requests = self.db.requests
+        if check_indexes:
+            try:
+                verify_indexes(self.db)
+            except QueryPlanError as e:
+                logger.error(f'{e}, run python -m db.indexes')
+                raise
+        self.dimensions = DimensionCache(self.db, dimensions_refresh_interval)
+        self.dimensions.refresh()
+
+    def enable_analytics(self, refresh_interval: float):
+        """
+        Loads requests to in-process columnar analytics engine, which is
+        used by get_analytics_by_filter afterwards.
+        :param refresh_interval: seconds between checks of new ingests
+        """
+        self.analytics = ColumnarAnalytics(self.db, refresh_interval)
+        self.analytics.load()
+
+    def enable_cube(self):
+        """
+        Answers get_analytics_by_filter from cube of requests, which must be
+        built by ingest or python -m db.cube.
+        """
+        self.use_cube = True
 
     def get_university_titles(self):
         return list(self.db.univs.find({}, {'_id': 0, 'univ_title': 1}))
 
     def get_knowledge_areas(self):
-        return list(self.db.areas.find({}, {'area_title': 1})
-                    .distinct('area_title'))
+        return self.db.areas.distinct('area_title')
 
     @staticmethod
     def _remove_none_from_list(values):
@@ -63,10 +214,12 @@ class DBPool(object):
         return self.db.areas.find({"area_title": title}, {"_id": 1})
 
     def get_regions(self):
-        values = list(self.db.univs.find({}, {'univ_location': 1})
-                      .distinct('univ_location'))
+        values = self.db.univs.distinct('univ_location')
         return DBPool._remove_none_from_list(values)
 
+    def get_generation(self) -> int:
+        return get_generation(self.db)
+
     def get_regions_by_filter(self, filter_data: dict):
         logger.debug(filter_data)
         filter_data = self._get_regions_by_filter(filter_data)
@@ -80,7 +233,7 @@ class DBPool(object):
         if 'area_title' in filter_data:
             values = filter_data.pop('area_title')
             result_query['course_id'] = {
-                "$in": self.get_courses_by_filter({'area_title': values})}
+                "$in": self.get_course_ids_by(values)}
         result_query.update(
             self._format_filter_data_to_mongo_request(filter_data))
         return result_query
@@ -98,12 +251,12 @@ class DBPool(object):
                         univ_ids = self._get_univ_ids(
                             data[key], data['univ_location'])
                     else:
-                        univ_ids = [generate_id(title) for title in data[key]]
+                        univ_ids = self.get_universities_by_titles(data[key])
                     if len(univ_ids) > 0:
                         result_query['univ_id'] = {"$in": univ_ids}
                 elif key == 'area_title':
-                    result_query['area_id_old'] = {
-                        "$in": [generate_id(title) for title in data[key]]}
+                    result_query['area_id'] = {"$in": list(
+                        self.dimensions.areas.get_ids(data[key]).values())}
                 else:
                     if key == 'is_enrolled':
                         result_query[key] = data[key] == 'true'
@@ -126,86 +279,243 @@ class DBPool(object):
             {"univ_id": univ_id},
             {"_id": 0, "univ_id": 1}).dictinct("univ_id"))
 
-    @lru_cache()
     def get_university_ids_by_region(self, region):
-        return [obj['univ_id'] for obj in self.db.univs.find(
-            {'univ_location': region})]
+        return self.get_university_ids_by_regions([region])
 
     def get_university_ids_by_regions(self, regions: list):
-        return list(chain(*[self.get_university_ids_by_region(region)
-                            for region in regions]))
+        univ_ids = self.dimensions.get_univ_ids_by_regions(regions)
+        return list(chain(*[univ_ids.get(region, []) for region in regions]))
 
-    @lru_cache(maxsize=10000)
     def get_course_ids_by_area_title(self, area_title):
-        area_id = generate_id(area_title)
+        return self.get_course_ids_by([area_title])
 
-        return [generate_id(obj['course_title'])
-                for obj in self.db.courses.find({'area_id_old': area_id})]
+    def get_course_ids_by_titles(self, course_titles: list) -> dict:
+        """
+        :return: {course_title: course_id}
+        """
+        return self.dimensions.courses.get_ids(course_titles)
+
+    def get_course_titles_by_ids(self, course_ids: list) -> dict:
+        """
+        :return: {course_id: course_title}
+        """
+        return self.dimensions.get_course_titles(course_ids)
 
     def get_course_ids_by(self, area_titles: list):
-        return list(chain(*[self.get_course_ids_by_area_title(area_title)
+        course_ids = self.dimensions.get_course_ids_by_areas(area_titles)
+        return list(chain(*[course_ids.get(area_title, [])
                             for area_title in area_titles]))
 
-    def get_requests_by_filter(self, request: Filter):
+    def _get_filter_lookups(self, request: Filter) -> dict:
+        """
+        :return: {key: (function, values)} for lookups the filter needs,
+        lookups do not depend on each other
+        """
+        lookups = {}
+        if request.univ_titles:
+            lookups['univ_ids_by_titles'] = (
+                self.get_universities_by_titles, request.univ_titles)
+        if request.knowledge_areas:
+            lookups['course_ids'] = (
+                self.get_course_ids_by, request.knowledge_areas)
+        if request.regions:
+            lookups['univ_ids_by_regions'] = (
+                self.get_university_ids_by_regions, request.regions)
+        return lookups
+
+    def resolve_filter(self, request: Filter) -> dict:
+        """
+        Resolves titles of universities, knowledge areas and regions of
+        filter to ids.
+        :return: {'univ_ids_by_titles': [...], 'course_ids': [...],
+        'univ_ids_by_regions': [...]} for fields present in filter
+        """
+        return {key: function(values) for key, (function, values)
+                in self._get_filter_lookups(request).items()}
+
+    def _build_requests_query(self, request: Filter,
+                              resolved: dict = None) -> dict:
+        """
+        :param resolved: result of resolve_filter, resolved if missing
+        """
+        if resolved is None:
+            resolved = self.resolve_filter(request)
         query = {}
-        if request.univ_ids:
-            query['univ_id'] = {'$in': request.univ_ids}
+        univ_ids = request.univ_ids
+        if request.univ_titles:
+            univ_ids = list(univ_ids or []) + \
+                resolved['univ_ids_by_titles']
+        if univ_ids is not None:
+            # unknown titles select nothing instead of every university
+            query['univ_id'] = {'$in': list(univ_ids)}
         if request.knowledge_areas:
-            query['course_id'] = {
-                '$in': self.get_course_ids_by(request.knowledge_areas)}
+            query['course_id'] = {'$in': resolved['course_ids']}
         if request.regions:
             if 'univ_id' not in query:
                 query['univ_id'] = {'$in': list()}
-            query['univ_id']['$in'].extend(
-                self.get_university_ids_by_regions(request.regions))
+            query['univ_id']['$in'].extend(resolved['univ_ids_by_regions'])
         if request.enrolled_only is not None:
             query['is_enrolled'] = bool(request.enrolled_only)
-        logger.debug(query)
+        if request.years:
+            query['year'] = {'$in': request.years}
+        if request.part_top_applicants and \
+                'value' in request.part_top_applicants:
+            top_type = request.part_top_applicants.get(
+                'type', DEFAULT_PART_TOP_TYPE)
+            query[PART_TOP_FIELDS[top_type]] = {
+                '$lt': float(request.part_top_applicants['value'])}
+        return query
+
+    def get_requests_by_filter(self, request: Filter):
+        query = self._build_requests_query(request)
         return list(self.requests.find(query))
 
-    @lru_cache()
     def get_university_by_id(self, univ_id):
-        result = self.db.univs.find_one({'univ_id': univ_id})
-        del result['_id']
-        return result
+        univ = self.dimensions.get_univs([univ_id]).get(univ_id)
+        return dict(univ) if univ else None
 
     def get_universities_by_ids(self, univ_ids):
-        return [self.get_university_by_id(univ_id)
-                for univ_id in sorted(univ_ids)]
+        univs = self.dimensions.get_univs(list(univ_ids))
+        return [dict(univs[univ_id]) for univ_id in sorted(univ_ids)
+                if univ_id in univs]
 
-    @lru_cache()
     def get_university_by_title(self, univ_title):
-        result = self.db.univs.find_one({'univ_title': univ_title})
-        return result['univ_id']
+        return self.dimensions.get_univ_ids_by_titles(
+            [univ_title]).get(univ_title)
 
     def get_universities_by_titles(self, univ_titles):
-        return [self.get_university_by_title(univ_title)
-                for univ_title in sorted(univ_titles)]
+        univ_ids = self.dimensions.get_univ_ids_by_titles(list(univ_titles))
+        missing = set(univ_titles) - set(univ_ids)
+        if missing:
+            logger.warning(f'Unknown universities: {missing}')
+        return [univ_ids[univ_title] for univ_title in sorted(univ_titles)
+                if univ_title in univ_ids]
 
     def get_universities_by_requests(self, requests):
         univ_ids = set(x['univ_id'] for x in requests)
         return self.get_universities_by_ids(univ_ids)
 
+    @staticmethod
+    def _get_statistics_stages(average_fields: dict) -> list:
+        """
+        Groups requests by university in two steps: by (university, rounded
+        score) and by university, so only distribution of scores, bounded by
+        range of scores, is collected instead of all scores.
+        :return: stages of aggregation pipeline, _id is univ_id
+        """
+        score_group = {
+            '_id': {'univ_id': '$univ_id',
+                    'score': get_score_key('$total_score')},
+            'score_count': {'$sum': 1},
+            'count': {'$sum': 1},
+            'passing_overall_score': {'$min': {
+                '$cond': ['$is_enrolled', '$total_score', None]}}}
+        for label, field in average_fields.items():
+            # $avg skips missing values, so count present ones
+            score_group[f'{label}_sum'] = {'$sum': f'${field}'}
+            score_group[f'{label}_n'] = {'$sum': {
+                '$cond': [{'$gt': [f'${field}', None]}, 1, 0]}}
+        return [{'$group': score_group},
+                *DBPool._get_univ_statistics_stages(average_fields)]
+
+    @staticmethod
+    def _get_univ_statistics_stages(average_fields: dict) -> list:
+        """
+        Second step of _get_statistics_stages, merges (university, score)
+        groups made from requests or from cells of cube.
+        """
+        univ_group = {
+            '_id': '$_id.univ_id', 'count': {'$sum': '$count'},
+            'passing_overall_score': {'$min': '$passing_overall_score'},
+            'score_distribution': {'$push': {'score': '$_id.score',
+                                             'count': '$score_count'}}}
+        project = {'count': 1, 'passing_overall_score': 1,
+                   'score_distribution': 1}
+        for label in average_fields:
+            univ_group[f'{label}_sum'] = {'$sum': f'${label}_sum'}
+            univ_group[f'{label}_n'] = {'$sum': f'${label}_n'}
+            project[label] = {'$cond': [
+                {'$gt': [f'${label}_n', 0]},
+                {'$divide': [f'${label}_sum', f'${label}_n']}, None]}
+        return [{'$group': univ_group}, {'$project': project}]
+
+    @staticmethod
+    def _summarize_scores(row: dict) -> dict:
+        row.update(summarize_scores(row.pop('score_distribution')))
+        return row
+
     def get_additional_data_by_univ(self, univ_ids: list,
                                     average_fields: dict,
                                     enrolled_only: bool = True):
         match = {'univ_id': {'$in': univ_ids}}
-        group = {'_id': "$univ_id", 'count': {'$sum': 1},
-                 'total_data': {'$push': '$total_score'}}
         if enrolled_only:
             match['is_enrolled'] = True
-            group['passing_overall_score'] = {'$min': f'$total_score'}
-        for label, field in average_fields.items():
-            group[label] = {'$avg': f'${field}'}
-        pipeline = [{'$match': match}, {'$group': group},
+        pipeline = [{'$match': match},
+                    *self._get_statistics_stages(average_fields),
                     {'$sort': {'_id': 1}}]
-        return list(self.requests.aggregate(pipeline))
+        return [self._summarize_scores(row)
+                for row in self.requests.aggregate(pipeline)]
+
+    def get_analytics_by_filter(self, request: Filter,
+                                average_fields: dict,
+                                sort_by: str = 'average_overall_score',
+                                resolved: dict = None):
+        """
+        Filters requests and calculates statistics per university in a
+        single aggregation, so applicant documents never leave the database.
+        Scores of university are summarized by histogram, quantiles and
+        digest (see db.histogram).
+        Filters without part of top applicants are answered from cube
+        (see db.cube) if it is enabled.
+        :param request: filter of admission requests
+        :param average_fields: {label: field} to calculate averages for
+        :param sort_by: label to sort the rows by (descending)
+        :param resolved: result of resolve_filter, resolved if missing
+        :return: iterator over rows with statistics and university info
+        """
+        match = self._build_requests_query(request, resolved)
+        if self.analytics is not None:
+            return self._get_analytics_in_process(
+                match, average_fields, sort_by)
+        if self.use_cube and can_use_cube(match, average_fields):
+            collection = self.db[CUBE_COLLECTION]
+            statistics_stages = [
+                *get_cube_statistics_stages(average_fields),
+                *self._get_univ_statistics_stages(average_fields)]
+        else:
+            collection = self.requests
+            statistics_stages = self._get_statistics_stages(average_fields)
+        pipeline = [
+            {'$match': match},
+            *statistics_stages,
+            {'$lookup': {'from': 'univs', 'localField': '_id',
+                         'foreignField': 'univ_id', 'as': 'univ'}},
+            {'$unwind': '$univ'},
+            {'$replaceRoot': {'newRoot': {
+                '$mergeObjects': ['$$ROOT', '$univ']}}},
+            {'$project': {'_id': 0, 'univ': 0}},
+            {'$sort': {sort_by: -1}}]
+        return map(self._summarize_scores,
+                   collection.aggregate(pipeline, allowDiskUse=True))
+
+    def _get_analytics_in_process(self, query: dict, average_fields: dict,
+                                  sort_by: str) -> iter:
+        with STAGE_SECONDS.time(stage='scan'):
+            rows = self.analytics.get_statistics(query, average_fields)
+        with STAGE_SECONDS.time(stage='univ_lookup'):
+            univs = self.dimensions.get_univs(
+                [row['univ_id'] for row in rows])
+        result = [self._summarize_scores(dict(row, **univs[row['univ_id']]))
+                  for row in rows if row['univ_id'] in univs]
+        # the same order as in MongoDB: missing values are the smallest
+        result.sort(key=lambda x: (x[sort_by] is not None, x[sort_by] or 0),
+                    reverse=True)
+        return iter(result)
 
     def get_knowledge_areas_by_university(self, univ_title: str) -> list:
         univ_id = self.get_university_by_title(univ_title)
-        courses = self.requests.distinct('course_id', {'univ_id': univ_id})
-        courses = [decode_id(course) for course in courses]
-        logger.debug(courses)
-        result = self.db.courses.distinct(
-            'area_id_old', {'course_title': {'$in': courses}})
-        return [decode_id(title) for title in result]
+        course_ids = self.requests.distinct('course_id', {'univ_id': univ_id})
+        logger.debug(course_ids)
+        area_ids = self.db.courses.distinct(
+            'area_id', {'course_id': {'$in': course_ids}})
+        return list(self.dimensions.get_area_titles(area_ids).values())
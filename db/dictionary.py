@@ -0,0 +1,191 @@
+"""
+Dense integer ids of titles of courses and knowledge areas. Ids are
+assigned once at ingest and kept in dictionary collection, so requests and
+cube store small integer keys instead of titles encoded by
+utils.generate_id.
+
+python -m db.dictionary --db ispyt --host localhost --migrate
+"""
+import argparse
+import logging
+import threading
+
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from db.cube import build_cube
+from db.meta import META_COLLECTION, bump_generation
+from src.logger import configure_logger
+from utils import decode_id
+
+logger = logging.getLogger(__name__)
+logger = configure_logger(logger)
+
+DICTIONARY_COLLECTION = 'dictionary'
+COURSE = 'course'
+AREA = 'area'
+DUPLICATE_KEY_ERROR = 11000
+
+
+def ensure_dictionary_indexes(db):
+    """
+    Unique indexes make concurrent assignment of ids safe: a title
+    inserted by two workers at once keeps only one id.
+    """
+    db[DICTIONARY_COLLECTION].create_index(
+        [('kind', ASCENDING), ('title', ASCENDING)], unique=True)
+    db[DICTIONARY_COLLECTION].create_index(
+        [('kind', ASCENDING), ('id', ASCENDING)], unique=True)
+
+
+class Dictionary(object):
+    """
+    Bidirectional mapping of titles of one kind to ids, backed by
+    dictionary collection. Missing titles get new ids on get_ids(create).
+    """
+
+    def __init__(self, db, kind: str):
+        self.db = db
+        self.kind = kind
+        self.ids = {}
+        self.titles = {}
+        # ids which are not found by get_titles, reset by load
+        self.unknown_ids = frozenset()
+        self.lock = threading.Lock()
+
+    def load(self):
+        ids = {item['title']: item['id'] for item in
+               self.db[DICTIONARY_COLLECTION].find(
+                   {'kind': self.kind}, {'_id': 0, 'title': 1, 'id': 1})}
+        # replace both at once, lookups may run in other threads
+        self.ids, self.titles = ids, {id_: title
+                                      for title, id_ in ids.items()}
+        self.unknown_ids = frozenset()
+
+    def _find(self, titles: list) -> dict:
+        return {item['title']: item['id'] for item in
+                self.db[DICTIONARY_COLLECTION].find(
+                    {'kind': self.kind, 'title': {'$in': titles}},
+                    {'_id': 0, 'title': 1, 'id': 1})}
+
+    def _allocate(self, n: int) -> int:
+        """
+        :return: first of n new ids
+        """
+        counter = self.db[META_COLLECTION].find_one_and_update(
+            {'_id': f'{DICTIONARY_COLLECTION}.{self.kind}'},
+            {'$inc': {'last_id': n}}, upsert=True,
+            return_document=ReturnDocument.AFTER)
+        return counter['last_id'] - n + 1
+
+    def _create(self, titles: list) -> dict:
+        first_id = self._allocate(len(titles))
+        try:
+            self.db[DICTIONARY_COLLECTION].insert_many(
+                [{'kind': self.kind, 'title': title, 'id': first_id + i}
+                 for i, title in enumerate(titles)], ordered=False)
+        except BulkWriteError as e:
+            # titles which were created by another process meanwhile are
+            # duplicates, any other error is not expected
+            if any(error.get('code') != DUPLICATE_KEY_ERROR
+                   for error in e.details.get('writeErrors', [])) or \
+                    e.details.get('writeConcernErrors'):
+                raise
+        return self._find(titles)
+
+    def get_ids(self, titles: list, create: bool = False) -> dict:
+        """
+        :param create: assign ids to titles missing in dictionary
+        :return: {title: id} for titles which were found or created
+        """
+        result = {title: self.ids[title] for title in titles
+                  if title in self.ids}
+        missing = sorted(set(titles) - set(result))
+        if missing:
+            with self.lock:
+                found = self._find(missing)
+                if create and len(found) < len(missing):
+                    found.update(self._create(
+                        [title for title in missing if title not in found]))
+                self.ids = {**self.ids, **found}
+                self.titles = {**self.titles, **{
+                    id_: title for title, id_ in found.items()}}
+            result.update(found)
+        return result
+
+    def get_titles(self, ids: list) -> dict:
+        """
+        Ids which are missing in dictionary (e.g. area_id None of courses
+        left by migrate) are requested once and then skipped until load().
+        :return: {id: title} for ids which were found
+        """
+        result = {id_: self.titles[id_] for id_ in ids
+                  if id_ in self.titles}
+        missing = [id_ for id_ in set(ids) if id_ not in result and
+                   id_ is not None and id_ not in self.unknown_ids]
+        if missing:
+            with self.lock:
+                found = {item['id']: item['title'] for item in
+                         self.db[DICTIONARY_COLLECTION].find(
+                             {'kind': self.kind, 'id': {'$in': missing}},
+                             {'_id': 0, 'title': 1, 'id': 1})}
+                self.titles = {**self.titles, **found}
+                self.ids = {**self.ids, **{
+                    title: id_ for id_, title in found.items()}}
+                self.unknown_ids = self.unknown_ids | \
+                    (set(missing) - set(found))
+            result.update(found)
+        return result
+
+
+def migrate(db) -> dict:
+    """
+    Replaces ids encoded by utils.generate_id in requests, areas and
+    courses with ids of dictionary. Cube must be rebuilt after it.
+    :param db: active connection to db
+    :return: number of migrated values of every kind
+    """
+    ensure_dictionary_indexes(db)
+    courses, areas = Dictionary(db, COURSE), Dictionary(db, AREA)
+    area_titles = db.areas.distinct('area_title')
+    area_ids = areas.get_ids(area_titles, create=True)
+    for title, area_id in area_ids.items():
+        db.areas.update_many({'area_title': title},
+                             {'$set': {'area_id': area_id}})
+    course_titles = db.courses.distinct('course_title')
+    course_ids = courses.get_ids(course_titles, create=True)
+    for course in db.courses.find({'area_id_old': {'$exists': True}}):
+        db.courses.update_one({'_id': course['_id']}, {
+            '$set': {'course_id': course_ids[course['course_title']],
+                     'area_id': area_ids.get(
+                         decode_id(course['area_id_old']))},
+            '$unset': {'area_id_old': ''}})
+    db.areas.update_many({}, {'$unset': {'area_id_old': ''}})
+    encoded_ids = [value for value in db.requests.distinct('course_id')
+                   if isinstance(value, str)]
+    request_ids = courses.get_ids(
+        [decode_id(value) for value in encoded_ids], create=True)
+    for encoded_id in encoded_ids:
+        db.requests.update_many(
+            {'course_id': encoded_id},
+            {'$set': {'course_id': request_ids[decode_id(encoded_id)]}})
+    stats = {'areas': len(area_ids), 'courses': len(course_ids),
+             'request_courses': len(encoded_ids)}
+    logger.info(f'Dictionary: migrated {stats}')
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Dictionary of ids of courses and knowledge areas')
+    parser.add_argument('--db', default='ispyt')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--migrate', action='store_true',
+                        help='replace base64 ids of existing data')
+    args = parser.parse_args()
+    database = MongoClient(args.host)[args.db]
+    ensure_dictionary_indexes(database)
+    if args.migrate:
+        print(migrate(database))
+        build_cube(database)
+        bump_generation(database)
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from db.dictionary import AREA, COURSE, Dictionary
+from db.meta import get_generation
+from src.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+logger = configure_logger(logger)
+
+DIMENSIONS = ['univs', 'univ_titles', 'regions', 'areas']
+
+
+class DimensionCache(object):
+    """
+    In-process copy of small collections (univs, areas, courses and
+    dictionary of their ids) used to resolve filters. Each collection is
+    loaded with a single query, values missing in cache are requested with
+    one $in query per lookup.
+    Cache is reloaded by refresh() or when generation of data is changed
+    (see db.meta).
+    """
+
+    def __init__(self, db, refresh_interval: float):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.generation = None
+        self.checked_at = 0.0
+        self.univs = {}
+        self.univ_ids_by_title = {}
+        self.univ_ids_by_region = {}
+        self.course_ids_by_area = {}
+        self.area_titles = []
+        self.courses = Dictionary(db, COURSE)
+        self.areas = Dictionary(db, AREA)
+        self.hits = dict.fromkeys(DIMENSIONS, 0)
+        self.misses = dict.fromkeys(DIMENSIONS, 0)
+        self.lock = threading.Lock()
+
+    def load(self):
+        started_at = time.monotonic()
+        generation = get_generation(self.db)
+        univs = {}
+        univ_ids_by_title = {}
+        univ_ids_by_region = defaultdict(list)
+        for univ in self.db.univs.find({}, {'_id': 0}):
+            univs[univ['univ_id']] = univ
+            univ_ids_by_title[univ['univ_title']] = univ['univ_id']
+            univ_ids_by_region[univ.get('univ_location')].append(
+                univ['univ_id'])
+        area_ids = {area['area_title']: area['area_id'] for area in
+                    self.db.areas.find({}, {'_id': 0, 'area_title': 1,
+                                            'area_id': 1})}
+        area_titles = list(area_ids)
+        course_ids_by_area_id = defaultdict(list)
+        for course in self.db.courses.find(
+                {}, {'_id': 0, 'course_id': 1, 'area_id': 1}):
+            course_ids_by_area_id[course['area_id']].append(
+                course['course_id'])
+        course_ids_by_area = {
+            title: course_ids_by_area_id.get(area_id, [])
+            for title, area_id in area_ids.items()}
+        self.courses.load()
+        self.areas.load()
+        # replace all at once, lookups may run in other threads
+        self.univs, self.univ_ids_by_title = univs, univ_ids_by_title
+        self.univ_ids_by_region = dict(univ_ids_by_region)
+        self.course_ids_by_area = course_ids_by_area
+        self.area_titles = area_titles
+        self.generation = generation
+        logger.info(f'Dimensions: loaded {len(univs)} universities and '
+                    f'{len(area_titles)} knowledge areas in '
+                    f'{time.monotonic() - started_at:.2f}s')
+
+    def refresh(self):
+        with self.lock:
+            self.load()
+            self.checked_at = time.monotonic()
+
+    def refresh_if_needed(self):
+        if time.monotonic() - self.checked_at < self.refresh_interval:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < self.refresh_interval:
+                return
+            if self.generation is None or \
+                    get_generation(self.db) != self.generation:
+                self.load()
+            self.checked_at = time.monotonic()
+
+    def _lookup(self, dimension: str, cache: dict, keys: list,
+                load_missing) -> dict:
+        """
+        Keys which are not found (or found with empty list of ids) are not
+        cached, so unknown values of requests do not grow the cache, they are
+        counted as misses on every lookup.
+        :param load_missing: function(missing keys) -> {key: value}
+        :return: {key: value} for keys which were found
+        """
+        self.refresh_if_needed()
+        result = {key: cache[key] for key in keys if key in cache}
+        missing = [key for key in set(keys) if key not in result]
+        self.hits[dimension] += len(keys) - len(missing)
+        self.misses[dimension] += len(missing)
+        if missing:
+            found = load_missing(missing)
+            cache.update((key, value) for key, value in found.items()
+                         if value != [])
+            result.update(found)
+        return result
+
+    def _load_univs(self, univ_ids: list) -> dict:
+        return {univ['univ_id']: univ for univ in self.db.univs.find(
+            {'univ_id': {'$in': univ_ids}}, {'_id': 0})}
+
+    def _load_univ_ids_by_titles(self, titles: list) -> dict:
+        return {univ['univ_title']: univ['univ_id'] for univ in
+                self.db.univs.find({'univ_title': {'$in': titles}},
+                                   {'_id': 0, 'univ_id': 1, 'univ_title': 1})}
+
+    def _load_univ_ids_by_regions(self, regions: list) -> dict:
+        result = {region: [] for region in regions}
+        for univ in self.db.univs.find({'univ_location': {'$in': regions}},
+                                       {'_id': 0, 'univ_id': 1,
+                                        'univ_location': 1}):
+            result[univ['univ_location']].append(univ['univ_id'])
+        return result
+
+    def _load_course_ids_by_areas(self, area_titles: list) -> dict:
+        titles = {area_id: title for title, area_id
+                  in self.areas.get_ids(area_titles).items()}
+        result = {title: [] for title in area_titles}
+        for course in self.db.courses.find(
+                {'area_id': {'$in': list(titles)}},
+                {'_id': 0, 'course_id': 1, 'area_id': 1}):
+            result[titles[course['area_id']]].append(course['course_id'])
+        return result
+
+    def get_univs(self, univ_ids: list) -> dict:
+        """
+        :return: {univ_id: university document}
+        """
+        return self._lookup('univs', self.univs, univ_ids,
+                            self._load_univs)
+
+    def get_univ_ids_by_titles(self, titles: list) -> dict:
+        """
+        :return: {univ_title: univ_id}
+        """
+        return self._lookup('univ_titles', self.univ_ids_by_title, titles,
+                            self._load_univ_ids_by_titles)
+
+    def get_univ_ids_by_regions(self, regions: list) -> dict:
+        """
+        :return: {region: [univ_id, ...]}
+        """
+        return self._lookup('regions', self.univ_ids_by_region, regions,
+                            self._load_univ_ids_by_regions)
+
+    def get_course_ids_by_areas(self, area_titles: list) -> dict:
+        """
+        :return: {area_title: [course_id, ...]}
+        """
+        return self._lookup('areas', self.course_ids_by_area, area_titles,
+                            self._load_course_ids_by_areas)
+
+    def get_course_titles(self, course_ids: list) -> dict:
+        """
+        :return: {course_id: course_title}
+        """
+        self.refresh_if_needed()
+        return self.courses.get_titles(course_ids)
+
+    def get_area_titles(self, area_ids: list) -> dict:
+        """
+        :return: {area_id: area_title}
+        """
+        self.refresh_if_needed()
+        return self.areas.get_titles(area_ids)
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for dimension in DIMENSIONS:
+            hits, misses = self.hits[dimension], self.misses[dimension]
+            stats[dimension] = {
+                'hits': hits, 'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+        return stats
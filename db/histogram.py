@@ -0,0 +1,101 @@
+"""
+Fixed size summaries of distribution of scores, sent to client instead of
+all scores of university.
+"""
+import math
+
+# scores are grouped with precision of 1 / SCORE_PRECISION
+SCORE_PRECISION = 10
+HISTOGRAM_BIN_WIDTH = 5
+QUANTILES = [10, 25, 50, 75, 90]
+# bigger compression keeps more centroids (about compression / 2)
+DIGEST_COMPRESSION = 50
+
+
+def get_score_key(field: str) -> dict:
+    """
+    :return: aggregation expression of score rounded down to precision
+    """
+    return {'$trunc': {'$multiply': [field, SCORE_PRECISION]}}
+
+
+def get_histogram(values: list) -> dict:
+    """
+    :param values: sorted array of (score, count)
+    :return: counts of scores in bins of HISTOGRAM_BIN_WIDTH
+    """
+    if not values:
+        return {'start': None, 'bin_width': HISTOGRAM_BIN_WIDTH, 'counts': []}
+    first_bin = math.floor(values[0][0] / HISTOGRAM_BIN_WIDTH)
+    last_bin = math.floor(values[-1][0] / HISTOGRAM_BIN_WIDTH)
+    counts = [0] * (last_bin - first_bin + 1)
+    for score, count in values:
+        counts[math.floor(score / HISTOGRAM_BIN_WIDTH) - first_bin] += count
+    return {'start': first_bin * HISTOGRAM_BIN_WIDTH,
+            'bin_width': HISTOGRAM_BIN_WIDTH, 'counts': counts}
+
+
+def get_quantiles(values: list, total: int) -> dict:
+    """
+    :param values: sorted array of (score, count)
+    :return: {'p10': score, ...} by nearest rank
+    """
+    quantiles = {}
+    ranks = [(q, max(1, math.ceil(q / 100 * total))) for q in QUANTILES]
+    seen = 0
+    for score, count in values:
+        seen += count
+        while ranks and ranks[0][1] <= seen:
+            quantiles[f'p{ranks[0][0]}'] = score
+            ranks.pop(0)
+    for q, _ in ranks:
+        quantiles[f'p{q}'] = None
+    return quantiles
+
+
+def _get_scale(q: float) -> float:
+    return DIGEST_COMPRESSION / (2 * math.pi) * math.asin(2 * q - 1)
+
+
+def _get_inverse_scale(k: float) -> float:
+    return (math.sin(2 * math.pi * k / DIGEST_COMPRESSION) + 1) / 2
+
+
+def get_digest(values: list, total: int) -> list:
+    """
+    Merges sorted values into centroids like t-digest does: centroids are
+    small near the tails and big near the median.
+    :param values: sorted array of (score, count)
+    :return: array of [mean, count]
+    """
+    if not values:
+        return []
+    centroids = []
+    merged = 0
+    mean, weight = values[0]
+    limit = _get_inverse_scale(_get_scale(0) + 1) * total
+    for score, count in values[1:]:
+        if merged + weight + count <= limit:
+            mean += (score - mean) * count / (weight + count)
+            weight += count
+            continue
+        centroids.append([round(mean, 3), weight])
+        merged += weight
+        limit = _get_inverse_scale(_get_scale(merged / total) + 1) * total
+        mean, weight = score, count
+    centroids.append([round(mean, 3), weight])
+    return centroids
+
+
+def summarize_scores(distribution: list) -> dict:
+    """
+    :param distribution: array of {'score': key, 'count': count} (see
+    get_score_key), key is None for requests without score
+    :return: {'score_histogram', 'score_quantiles', 'score_digest'}
+    """
+    values = sorted((x['score'] / SCORE_PRECISION, x['count'])
+                    for x in distribution if x['score'] is not None)
+    total = sum(count for _, count in values)
+    return {'score_histogram': get_histogram(values),
+            'score_quantiles': get_quantiles(values, total),
+            'score_digest': get_digest(values, total)}
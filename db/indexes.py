@@ -0,0 +1,153 @@
+import argparse
+import logging
+
+from pymongo import ASCENDING, MongoClient
+
+from src.exceptions import QueryPlanError
+from src.logger import configure_logger
+from src.model import PART_TOP_FIELDS
+
+logger = logging.getLogger(__name__)
+logger = configure_logger(logger)
+
+# compound indexes matched to the queries of DBPool
+INDEXES = {
+    'requests': [
+        # get_additional_data_by_univ, get_requests_by_filter by univs
+        [('univ_id', ASCENDING), ('is_enrolled', ASCENDING),
+         ('total_score', ASCENDING)],
+        # get_requests_by_filter by knowledge areas (and univs)
+        [('course_id', ASCENDING), ('univ_id', ASCENDING),
+         ('is_enrolled', ASCENDING)],
+        # data_parser.pipeline: requests of a reloaded file are deleted
+        [('year', ASCENDING), ('univ_id', ASCENDING),
+         ('list_id', ASCENDING)],
+    ] + [
+        # get_requests_by_filter by years and top applicants
+        [('year', ASCENDING), (field, ASCENDING)]
+        for field in PART_TOP_FIELDS.values()
+    ],
+    'requests_cube': [
+        # get_analytics_by_filter from cube
+        [('univ_id', ASCENDING), ('course_id', ASCENDING),
+         ('year', ASCENDING), ('is_enrolled', ASCENDING)],
+        [('course_id', ASCENDING), ('year', ASCENDING)],
+    ],
+    'univs': [
+        [('univ_id', ASCENDING)],
+        [('univ_title', ASCENDING)],
+        [('univ_location', ASCENDING)],
+    ],
+    'areas': [
+        [('area_title', ASCENDING)],
+    ],
+    'courses': [
+        [('area_id', ASCENDING)],
+        [('course_id', ASCENDING)],
+    ],
+}
+
+# example queries of the same shape as the hot queries of DBPool
+QUERY_SHAPES = {
+    'requests': [
+        {'univ_id': {'$in': [0]}, 'is_enrolled': True},
+        {'course_id': {'$in': [0]}, 'univ_id': {'$in': [0]},
+         'is_enrolled': True},
+        {'course_id': {'$in': [0]}},
+        {'year': {'$in': [2017]}, PART_TOP_FIELDS['overall']: {'$lt': 20.0}},
+        {'year': 2017, 'univ_id': 0, 'list_id': 0},
+    ],
+    'requests_cube': [
+        {'univ_id': {'$in': [0]}, 'is_enrolled': True},
+        {'course_id': {'$in': [0]}, 'year': {'$in': [2017]}},
+    ],
+    'univs': [
+        {'univ_id': 0},
+        {'univ_title': ''},
+        {'univ_location': ''},
+    ],
+    'areas': [
+        {'area_title': ''},
+    ],
+    'courses': [
+        {'area_id': 0},
+        {'course_id': {'$in': [0]}},
+    ],
+}
+
+
+def ensure_indexes(db):
+    """
+    Creates all indexes required by the API. Existing indexes are kept.
+    Indexes are created by data_parser and python -m db.indexes, not by
+    processes of the API.
+    :param db: active connection to db
+    """
+    for collection, indexes in INDEXES.items():
+        for keys in indexes:
+            db[collection].create_index(keys)
+
+
+def _get_plan_stages(plan) -> list:
+    """
+    Collects stages and index names of a query plan (returned by explain)
+    :return: array of (stage, index_name)
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append((plan['stage'], plan.get('indexName')))
+        for value in plan.values():
+            stages.extend(_get_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_get_plan_stages(value))
+    return stages
+
+
+def explain_query(db, collection: str, query: dict) -> list:
+    """
+    :return: array of (stage, index_name) of the winning query plan
+    """
+    explanation = db[collection].find(query).explain()
+    return _get_plan_stages(explanation['queryPlanner']['winningPlan'])
+
+
+def verify_indexes(db) -> dict:
+    """
+    Checks that every hot query uses an index.
+    :param db: active connection to db
+    :return: {collection: [(query, [index_name])]}
+    :raises QueryPlanError: if any query plan falls back to COLLSCAN
+    """
+    report = {}
+    collection_scans = []
+    for collection, queries in QUERY_SHAPES.items():
+        report[collection] = []
+        for query in queries:
+            stages = explain_query(db, collection, query)
+            index_names = [index for _, index in stages if index]
+            logger.info(f'{collection} {query} ==> indexes {index_names}')
+            report[collection].append((query, index_names))
+            if any(stage == 'COLLSCAN' for stage, _ in stages):
+                collection_scans.append(f'{collection} {query}')
+    if collection_scans:
+        raise QueryPlanError(
+            f'Queries fall back to COLLSCAN: {collection_scans}')
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', dest='db', type=str,
+                        help='database name', required=True)
+    parser.add_argument('--host', dest='db_host', type=str,
+                        help='db host', default='localhost')
+    parser.add_argument('--verify', dest='verify', action='store_true',
+                        help='verify that queries use indexes')
+    parser.set_defaults(verify=False)
+    args = parser.parse_args()
+    database = MongoClient(host=args.db_host).get_database(args.db)
+    ensure_indexes(database)
+    if args.verify:
+        verify_indexes(database)
@@ -0,0 +1,25 @@
+from pymongo import ReturnDocument
+
+META_COLLECTION = 'meta'
+INGEST_ID = 'ingest'
+
+
+def get_generation(db) -> int:
+    """
+    :param db: active connection to db
+    :return: generation of data, it is changed after every ingest
+    """
+    meta = db[META_COLLECTION].find_one({'_id': INGEST_ID})
+    return meta['generation'] if meta else 0
+
+
+def bump_generation(db) -> int:
+    """
+    Marks that ingest has finished, so caches of data are invalidated.
+    :param db: active connection to db
+    :return: new generation of data
+    """
+    meta = db[META_COLLECTION].find_one_and_update(
+        {'_id': INGEST_ID}, {'$inc': {'generation': 1}}, upsert=True,
+        return_document=ReturnDocument.AFTER)
+    return meta['generation']
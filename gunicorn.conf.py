@@ -0,0 +1,13 @@
+import multiprocessing
+
+from settings import APP_HOST, APP_PORT, SERVER_WORKERS, SERVER_THREADS, \
+    SERVER_TIMEOUT
+
+bind = f'{APP_HOST}:{APP_PORT}'
+workers = SERVER_WORKERS or 2 * multiprocessing.cpu_count() + 1
+# requests mostly wait for MongoDB, threads share connection pool of worker
+worker_class = 'gthread'
+threads = SERVER_THREADS
+timeout = SERVER_TIMEOUT
+# application is created in every worker, MongoClient is not fork-safe
+preload_app = False
@@ -1,5 +1,27 @@
 DB_HOST = 'localhost'
 DB_PORT = 27017
 DB_NAME = 'ispyt'
+# MongoClient options, connections are pooled per worker process
+DB_MAX_POOL_SIZE = 50  # keep >= SERVER_THREADS
+DB_MIN_POOL_SIZE = 0
+DB_CONNECT_TIMEOUT_MS = 5000
+DB_SOCKET_TIMEOUT_MS = 30000
+DB_SERVER_SELECTION_TIMEOUT_MS = 5000
+DB_WAIT_QUEUE_TIMEOUT_MS = 5000
+DB_READ_PREFERENCE = 'primaryPreferred'
+DB_CHECK_INDEXES = False  # fail at start if hot queries scan collections
 APP_HOST = 'localhost'
 APP_PORT = 8080
+SERVER_WORKERS = None  # processes of gunicorn, None: 2 * number of CPUs + 1
+SERVER_THREADS = 8  # threads per process
+SERVER_TIMEOUT = 60  # seconds
+ANALYTICS_ENGINE = False  # answer POST / from in-process column arrays
+ANALYTICS_REFRESH_INTERVAL = 60  # seconds between checks of new ingests
+CUBE_QUERIES = False  # answer POST / from cube built by ingest (db.cube)
+METADATA_CACHE_TTL = 30  # seconds between checks of new ingests for GET /
+RESULT_CACHE_BACKEND = 'memory'  # 'memory', 'sqlite' or None
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULT_CACHE_PATH = 'result_cache.sqlite3'  # for 'sqlite' backend
+RESULT_CACHE_TTL = 30  # seconds between checks of new ingests
+DIMENSIONS_REFRESH_INTERVAL = 60  # seconds between checks of new ingests
+STREAM_RESPONSES = True  # send rows of POST / while reading them from db
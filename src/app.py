@@ -1,31 +1,62 @@
 import json
 import logging
+import time
+from functools import partial
 
-from flask import Flask, Response, request
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 
 from db import DBPool
-from settings import DB_HOST, DB_PORT, DB_NAME, APP_HOST, APP_PORT
+from settings import DB_HOST, DB_PORT, DB_NAME, APP_HOST, APP_PORT, \
+    DB_MAX_POOL_SIZE, DB_MIN_POOL_SIZE, DB_CONNECT_TIMEOUT_MS, \
+    DB_SOCKET_TIMEOUT_MS, DB_SERVER_SELECTION_TIMEOUT_MS, \
+    DB_WAIT_QUEUE_TIMEOUT_MS, DB_READ_PREFERENCE, DB_CHECK_INDEXES, \
+    ANALYTICS_ENGINE, ANALYTICS_REFRESH_INTERVAL, CUBE_QUERIES, \
+    METADATA_CACHE_TTL, RESULT_CACHE_BACKEND, RESULT_CACHE_MAX_BYTES, \
+    RESULT_CACHE_PATH, RESULT_CACHE_TTL, DIMENSIONS_REFRESH_INTERVAL, \
+    STREAM_RESPONSES
+from src.cache import MetadataCache, create_result_cache
+from src.exceptions import ValidationError
+from src.serialization import iter_json_array
 from src.logger import configure_logger
+from src.metrics import REGISTRY, REQUEST_SECONDS, STAGE_SECONDS, \
+    CONTENT_TYPE, CommandMetrics, register_cache, timed_iter
 from src.validator import check_filter_request
 
 logger = logging.getLogger(__file__)
 logger = configure_logger(logger)
 
-# start application
-app = Flask(__name__)
-db = DBPool(DB_HOST, DB_PORT)
-db.connect(DB_NAME)
-CORS(app)
-
 FILTER_PARAMS = {'univs': 'Університет', 'knowledge_areas': 'Галузь знань',
                  'years': 'Рік', 'type.school_score': 'По балам атестату',
                  'regions': 'Регіон', 'type.gov_exams': 'По балам ЗНО',
                  'part_top_applicants.value': 'ТОП студентів(%)'}
 
+# keys are SORT_LABELS of src.model
+LABELS_FIELDS = {
+    'average_overall_score': 'total_score',
+    'average_school_score': 'school_score'
+}
+
+
+def create_db_pool() -> DBPool:
+    db = DBPool(DB_HOST, DB_PORT, {
+        'maxPoolSize': DB_MAX_POOL_SIZE,
+        'minPoolSize': DB_MIN_POOL_SIZE,
+        'connectTimeoutMS': DB_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': DB_SOCKET_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': DB_SERVER_SELECTION_TIMEOUT_MS,
+        'waitQueueTimeoutMS': DB_WAIT_QUEUE_TIMEOUT_MS,
+        'readPreference': DB_READ_PREFERENCE,
+        'event_listeners': [CommandMetrics()]})
+    db.connect(DB_NAME, DIMENSIONS_REFRESH_INTERVAL, DB_CHECK_INDEXES)
+    if CUBE_QUERIES:
+        db.enable_cube()
+    if ANALYTICS_ENGINE:
+        db.enable_analytics(ANALYTICS_REFRESH_INTERVAL)
+    return db
+
 
-@app.route('/', methods=['GET'])
-def get_filtering_params():
+def build_filtering_params(db: DBPool) -> bytes:
     knowledge_areas = db.get_knowledge_areas()
     regions = db.get_regions()
     university_titles = db.get_university_titles()
@@ -35,40 +66,93 @@ def get_filtering_params():
         'univ_location': regions,
         'univ_title': [x['univ_title'] for x in university_titles]
     }
-    response = Response(
-        json.dumps(response_dict),
-        mimetype='application/json')
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    logger.info(f'[GET] Response\n{response.json}')
-    return response
-
-
-@app.route('/', methods=['POST'])
-def filter_data_and_analyse():
-    data = request.get_json()
-    logger.info(f'[POST] Received\n{data}')
-    data = check_filter_request(data)
-    if data.filter.univ_titles:
-        data.filter.univ_ids = db.get_universities_by_titles(
-            data.filter.univ_titles)
-        data.filter.univ_titles = None
-    requests = db.get_requests_by_filter(data.filter)
-    univs = db.get_universities_by_requests(requests)
-    univ_ids = [univ['univ_id'] for univ in univs]
-    labels_fields = {
-        'average_overall_score': 'total_score',
-        'average_school_score': 'school_score'
-    }
-    additional_info = db.get_additional_data_by_univ(
-        univ_ids, labels_fields)
-    for info, univ in zip(additional_info, univs):
-        info.update(univ)
-        del info['_id']
-    result = sorted(additional_info, key=lambda x: x['average_overall_score'],
-                    reverse=True)
-    return Response(json.dumps(result), mimetype='application/json')
+    return json.dumps(response_dict).encode('utf-8')
+
+
+def create_app() -> Flask:
+    """
+    Creates application with its own connection to database and caches.
+    Must be called in every worker process after fork (MongoClient is not
+    fork-safe), see wsgi.py.
+    """
+    app = Flask(__name__)
+    CORS(app)
+    db = create_db_pool()
+    filtering_params_cache = MetadataCache(
+        partial(build_filtering_params, db), db.get_generation,
+        METADATA_CACHE_TTL)
+    result_cache = create_result_cache(
+        RESULT_CACHE_BACKEND, db.get_generation, RESULT_CACHE_TTL,
+        RESULT_CACHE_MAX_BYTES, RESULT_CACHE_PATH)
+    register_cache('dimensions', db.dimensions.get_stats)
+    if result_cache is not None:
+        register_cache('result', result_cache.get_stats)
+
+    @app.before_request
+    def start_timer():
+        g.started_at = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        # streamed bodies are sent later, see stage "serialize"
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - g.started_at, method=request.method,
+            endpoint=request.url_rule.rule if request.url_rule else '',
+            status=response.status_code)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    @app.route('/', methods=['GET'])
+    def get_filtering_params():
+        body, etag = filtering_params_cache.get()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    @app.route('/', methods=['POST'])
+    def filter_data_and_analyse():
+        with STAGE_SECONDS.time(stage='validate'):
+            try:
+                data = check_filter_request(request.get_json(silent=True))
+            except ValidationError as e:
+                return Response(json.dumps({'errors': e.errors}),
+                                status=400, mimetype='application/json')
+        with STAGE_SECONDS.time(stage='resolve'):
+            resolved = db.resolve_filter(data.filter)
+        if data.filter.univ_titles:
+            data.filter.univ_ids = resolved.pop('univ_ids_by_titles')
+            data.filter.univ_titles = None
+        key = f'{data.sort_by}:{data.filter.get_canonical_key()}'
+        with STAGE_SECONDS.time(stage='result_cache'):
+            body, generation = result_cache.get(key) \
+                if result_cache is not None else (None, None)
+        if body is not None:
+            return Response(body, mimetype='application/json')
+        with STAGE_SECONDS.time(stage='query'):
+            rows = db.get_analytics_by_filter(
+                data.filter, LABELS_FIELDS, data.sort_by, resolved=resolved)
+        # rows of cursor are fetched while they are serialized
+        chunks = timed_iter(iter_json_array(rows), 'serialize')
+        if result_cache is not None:
+            chunks = result_cache.set_from_chunks(key, chunks, generation)
+        if STREAM_RESPONSES:
+            # rows are serialized while they are read from cursor
+            return Response(chunks, mimetype='application/json')
+        return Response(b''.join(chunks), mimetype='application/json')
+
+    return app
 
 
 if __name__ == '__main__':
+    # development server, see wsgi.py for production
+    app = create_app()
     app.debug = True
     app.run(host=APP_HOST, port=APP_PORT)
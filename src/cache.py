@@ -0,0 +1,251 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class MetadataCache(object):
+    """
+    Keeps pre-serialized response body with its strong ETag.
+    The body is rebuilt when generation of data is changed (see db.meta).
+    Generation is checked not more often than once per ttl seconds.
+    """
+
+    def __init__(self, build_body, get_generation, ttl: float):
+        """
+        :param build_body: function() -> bytes
+        :param get_generation: function() -> int
+        :param ttl: seconds between checks of generation
+        """
+        self.build_body = build_body
+        self.get_generation = get_generation
+        self.ttl = ttl
+        self.body = None
+        self.etag = None
+        self.generation = None
+        # monotonic time starts at an arbitrary point, e.g. boot
+        self.checked_at = float('-inf')
+        self.lock = threading.Lock()
+
+    def get(self) -> (bytes, str):
+        """
+        :return: (body, etag)
+        """
+        if time.monotonic() - self.checked_at >= self.ttl:
+            with self.lock:
+                if time.monotonic() - self.checked_at >= self.ttl:
+                    self._refresh()
+        return self.body, self.etag
+
+    def _refresh(self):
+        generation = self.get_generation()
+        if self.body is None or generation != self.generation:
+            body = self.build_body()
+            self.body, self.etag = body, hashlib.sha1(body).hexdigest()
+            self.generation = generation
+        self.checked_at = time.monotonic()
+
+    def invalidate(self):
+        self.checked_at = float('-inf')
+        self.generation = None
+
+
+class MemoryBackend(object):
+    """
+    In-process storage with LRU eviction bounded by total size of values.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.items:
+                self.size -= len(self.items.pop(key))
+            self.items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.size = 0
+
+
+class SqliteBackend(object):
+    """
+    Storage in local file shared by processes (e.g. Gunicorn workers),
+    least recently used values are evicted when total size of values
+    exceeds the limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, '
+                'value BLOB, size INTEGER, used_at REAL)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_used_at ON cache(used_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections cannot be shared by threads
+        if getattr(self.local, 'connection', None) is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.local.connection = connection
+        return self.local.connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        connection = self._connect()
+        row = connection.execute('SELECT value FROM cache WHERE key = ?',
+                                 (key,)).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute('UPDATE cache SET used_at = ? WHERE key = ?',
+                               (time.time(), key))
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                (key, value, len(value), time.time()))
+            size = connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+            for evicted_key, evicted_size in connection.execute(
+                    'SELECT key, size FROM cache ORDER BY used_at').fetchall():
+                if size <= self.max_bytes:
+                    break
+                connection.execute('DELETE FROM cache WHERE key = ?',
+                                   (evicted_key,))
+                size -= evicted_size
+
+    def clear(self):
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM cache')
+
+
+class ResultCache(object):
+    """
+    Cache of serialized responses. Keys include generation of data (see
+    db.meta), so results of previous ingests are never returned, and the
+    backend is cleared when generation is changed. Results are saved only
+    if generation has not been changed since get(), a result which is built
+    from data of the previous ingest is dropped.
+    """
+
+    def __init__(self, backend, get_generation, ttl: float):
+        """
+        :param backend: MemoryBackend or SqliteBackend
+        :param get_generation: function() -> int
+        :param ttl: seconds between checks of generation
+        """
+        self.backend = backend
+        self.get_generation = get_generation
+        self.ttl = ttl
+        self.generation = None
+        self.checked_at = float('-inf')
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+
+    def _check_generation(self):
+        if time.monotonic() - self.checked_at < self.ttl:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < self.ttl:
+                return
+            generation = self.get_generation()
+            if self.generation is not None and \
+                    generation != self.generation:
+                self.backend.clear()
+            self.generation = generation
+            self.checked_at = time.monotonic()
+
+    def get(self, key: str) -> (Optional[bytes], int):
+        """
+        :return: (value or None, generation to pass to set)
+        """
+        self._check_generation()
+        generation = self.generation
+        value = self.backend.get(f'{generation}:{key}')
+        with self.stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value, generation
+
+    def set(self, key: str, value: bytes, generation: int):
+        """
+        :param generation: generation returned by get()
+        """
+        self._check_generation()
+        # under the lock, so the backend is not cleared meanwhile
+        with self.lock:
+            if generation == self.generation:
+                self.backend.set(f'{generation}:{key}', value)
+
+    def set_from_chunks(self, key: str, chunks, generation: int) -> iter:
+        """
+        Passes chunks through and saves them joined when all of them were
+        sent, unless they exceed maximal size of backend.
+        :param generation: generation returned by get()
+        """
+        values, size = [], 0
+        for chunk in chunks:
+            if values is not None:
+                values.append(chunk)
+                size += len(chunk)
+                if size > self.backend.max_bytes:
+                    values = None
+            yield chunk
+        if values is not None:
+            self.set(key, b''.join(values), generation)
+
+    def get_stats(self) -> dict:
+        with self.stats_lock:
+            hits, misses = self.hits, self.misses
+        requests = hits + misses
+        return {'hits': hits, 'misses': misses,
+                'hit_rate': hits / requests if requests else 0.0}
+
+
+def create_result_cache(backend: str, get_generation, ttl: float,
+                        max_bytes: int, path: str) -> Optional[ResultCache]:
+    """
+    :param backend: 'memory', 'sqlite' or None to disable cache
+    """
+    if backend is None:
+        return None
+    if backend == 'memory':
+        return ResultCache(MemoryBackend(max_bytes), get_generation, ttl)
+    if backend == 'sqlite':
+        return ResultCache(SqliteBackend(path, max_bytes), get_generation,
+                           ttl)
+    raise ValueError(f'Unknown backend of result cache: {backend}')
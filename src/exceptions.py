@@ -1,2 +1,16 @@
 class InvalidRequestParameter(Exception):
     pass
+
+
+class QueryPlanError(Exception):
+    pass
+
+
+class ValidationError(InvalidRequestParameter):
+    """
+    :param errors: array of {path of field: error}
+    """
+
+    def __init__(self, errors: list):
+        super(ValidationError, self).__init__(errors)
+        self.errors = errors
@@ -0,0 +1,212 @@
+"""
+Metrics of the API in Prometheus text format: latency histograms of
+requests and of stages of POST /, MongoDB commands (pymongo command
+monitoring) and hit rates of caches. Metrics are kept per process, so
+every gunicorn worker is scraped separately.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# seconds, from a cache hit to a scan of all requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Histogram(object):
+    def __init__(self, name: str, documentation: str, labels: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float('inf'),)
+        # {labels: [counts of buckets, sum]}
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [[0] * len(self.buckets), 0.0]
+            counts[0][i] += 1
+            counts[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        with self.lock:
+            values = {key: (list(counts), total)
+                      for key, (counts, total) in self.values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key,
+                                        f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class CallbackGauge(object):
+    """
+    Gauge which values are read when metrics are rendered.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: tuple,
+                 get_values):
+        """
+        :param get_values: function() -> {label values: value}
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.get_values = get_values
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.type}']
+        for key, value in sorted(self.get_values().items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} '
+                         f'{_format_value(value)}')
+        return lines
+
+
+class CallbackCounter(CallbackGauge):
+    """
+    Counter which values are read when metrics are rendered, values must
+    only grow.
+    """
+    type = 'counter'
+
+
+class Registry(object):
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'ispyt_request_seconds', 'Latency of requests to the API',
+    ('method', 'endpoint', 'status')))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'ispyt_stage_seconds', 'Latency of stages of POST /', ('stage',)))
+MONGO_COMMAND_SECONDS = REGISTRY.register(Histogram(
+    'ispyt_mongo_command_seconds', 'Duration of MongoDB commands',
+    ('command', 'status')))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Listener of pymongo command monitoring, pass it to MongoClient in
+    event_listeners.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 10 ** 6,
+                                      command=event.command_name,
+                                      status='succeeded')
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 10 ** 6,
+                                      command=event.command_name,
+                                      status='failed')
+
+
+def register_cache(name: str, get_stats):
+    """
+    Exposes hits, misses and hit rate of a cache, a cache registered again
+    under the same name replaces the previous one.
+    :param get_stats: function() -> {'hits', 'misses', 'hit_rate'} or
+    {part: {'hits', 'misses', 'hit_rate'}} for caches with parts
+    """
+    CACHES[name] = get_stats
+
+
+def _get_cache_values(key: str) -> dict:
+    """
+    :return: {(cache, part): value of key}
+    """
+    values = {}
+    for name, get_stats in list(CACHES.items()):
+        stats = get_stats()
+        if key in stats:
+            values[(name, '')] = stats[key]
+        else:
+            values.update({(name, part): part_stats[key]
+                           for part, part_stats in stats.items()})
+    return values
+
+
+# {name: function() -> stats}, see register_cache
+CACHES = {}
+for _key, _name, _metric, _documentation in [
+        ('hits', 'hits_total', CallbackCounter, 'Hits of cache'),
+        ('misses', 'misses_total', CallbackCounter, 'Misses of cache'),
+        ('hit_rate', 'hit_rate', CallbackGauge, 'Hit rate of cache')]:
+    REGISTRY.register(_metric(
+        f'ispyt_cache_{_name}', _documentation, ('cache', 'part'),
+        lambda key=_key: _get_cache_values(key)))
+
+
+def timed_iter(iterable, stage: str):
+    """
+    Records time spent on producing items of iterable as stage, e.g.
+    serialization of rows which are read from a cursor.
+    """
+    iterator = iter(iterable)
+    seconds = 0.0
+    try:
+        while True:
+            started_at = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - started_at
+            yield item
+    finally:
+        STAGE_SECONDS.observe(seconds, stage=stage)
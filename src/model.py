@@ -1,3 +1,5 @@
+import json
+
 from src.exceptions import InvalidRequestParameter
 
 LENGTHS = {
@@ -7,39 +9,64 @@ LENGTHS = {
 }
 
 PART_TOP_TYPES = ['gov_exams', 'school_score', 'overall']
+# fields with precomputed percentile rank (% of applicants ranked higher)
+PART_TOP_FIELDS = {'gov_exams': 'top_gov_exams',
+                   'school_score': 'top_school_score',
+                   'overall': 'top_overall'}
+DEFAULT_PART_TOP_TYPE = 'overall'
+# labels of averages which rows of analytics can be sorted by
+SORT_LABELS = ['average_overall_score', 'average_school_score']
 
 
 class Filter:
-    keys_types = {
-        'univ_ids': list,
-        'univ_titles': list,
-        'knowledge_areas': list,
-        'part_top_applicants': dict,
-        'regions': list, 'years': list,
-        'enrolled_only': bool}
-    keys = set(keys_types.keys())
+    """
+    Types and values of fields of requests are checked by src.validator.
+    """
+    keys = ('univ_ids', 'univ_titles', 'knowledge_areas',
+            'part_top_applicants', 'regions', 'years', 'enrolled_only')
 
     def __init__(self, obj: dict):
-        extra_fields = set(obj.keys()) - self.keys
+        extra_fields = obj.keys() - self.keys
         if extra_fields:
             raise InvalidRequestParameter(f'Unknown fields: {extra_fields}')
-        for key in obj.keys():
-            if type(obj[key]) != self.keys_types[key]:
-                raise InvalidRequestParameter(
-                    f'Invalid type for field {key}: Actual:{type(obj[key])}, '
-                    f'Expected: {self.keys_types[key]}')
-        list(map(lambda key: setattr(self, key, obj.get(key, None)),
-                 Filter.keys))
+        for key in self.keys:
+            setattr(self, key, obj.get(key))
+
+    def get_canonical_key(self) -> str:
+        """
+        :return: the same string for filters which select the same data
+        """
+        def normalize(values):
+            return sorted(set(values)) if values else None
+
+        part_top = None
+        if self.part_top_applicants and \
+                'value' in self.part_top_applicants:
+            part_top = {
+                'type': self.part_top_applicants.get(
+                    'type', DEFAULT_PART_TOP_TYPE),
+                'value': float(self.part_top_applicants['value'])}
+        return json.dumps({
+            # empty univ_ids (all titles are unknown) select nothing
+            'univ_ids': None if self.univ_ids is None
+            else sorted(set(self.univ_ids)),
+            'univ_titles': normalize(self.univ_titles),
+            'knowledge_areas': normalize(self.knowledge_areas),
+            'regions': normalize(self.regions),
+            'years': normalize(self.years),
+            'enrolled_only': None if self.enrolled_only is None
+            else bool(self.enrolled_only),
+            'part_top_applicants': part_top}, sort_keys=True)
 
 
 class FilterRequest:
     keys = {'filter', 'sort_by'}
 
     def __init__(self, obj: dict):
-        extra_fields = set(obj.keys()) - self.keys
+        extra_fields = obj.keys() - self.keys
         if extra_fields:
             raise InvalidRequestParameter(f'Unknown fields: {extra_fields}')
         if 'filter' not in obj.keys():
             raise InvalidRequestParameter(f'Field "filter" is required')
         self.filter = Filter(obj['filter'])
-        # TODO: sort
+        self.sort_by = obj.get('sort_by', SORT_LABELS[0])
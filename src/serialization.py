@@ -0,0 +1,26 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # faster encoder is optional
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def iter_json_array(rows) -> iter:
+    """
+    Serializes rows one by one, so response can be sent before all rows
+    are fetched from database cursor.
+    :return: chunks of JSON array
+    """
+    yield b'['
+    separator = b''
+    for row in rows:
+        yield separator + dumps(row)
+        separator = b','
+    yield b']'
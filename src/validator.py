@@ -1,105 +1,198 @@
+"""
+Validation of body of POST / by declarative schema. Schema is compiled
+once to nested functions, so a request is checked in one pass without
+lookups in the schema, and all errors are collected with paths of fields.
+"""
 import logging
-from typing import Optional
+import math
 
-from src.exceptions import InvalidRequestParameter
+from src.exceptions import ValidationError
 from src.logger import configure_logger
-from src.model import FilterRequest, Filter, PART_TOP_TYPES, LENGTHS
+from src.model import FilterRequest, PART_TOP_TYPES, LENGTHS, SORT_LABELS
 
 logger = logging.getLogger(__file__)
 logger = configure_logger(logger)
 
 YEARS = [2014, 2015, 2016, 2017, 2018]
+# max items of lists, values of lists become $in of queries
+MAX_ITEMS = {
+    'univ_ids': 500,
+    'univ_titles': 500,
+    'knowledge_areas': 100,
+    'regions': 50,
+    'years': len(YEARS)
+}
 
 ERRORS = {
     'check_min_length': 'value is too short',
     'check_max_length': 'value is too long',
     'field_missing': 'field is required. Field is missing in  request',
-    'check_boolean': 'field must be boolean ("true"/"false")',
-    'unknown_value': 'Cannot recognize field value'
+    'unknown_field': 'unknown field',
+    'unknown_value': 'Cannot recognize field value',
+    'check_type': 'value must be {}',
+    'check_range': 'value must be between {} and {}',
+    'check_finite': 'value must be a finite number',
+    'check_max_items': 'list must have at most {} items'
 }
 
 
-def check_filter_request(request_json: dict) -> Optional[FilterRequest]:
-    try:
-        filter_request = FilterRequest(request_json)
-        check_filter(filter_request.filter)
-        return filter_request
-    except Exception as e:
-        logger.error(e)
-
-
-def check_filter(request: Filter):
-    if request.part_top_applicants is not None and \
-            'type' in request.part_top_applicants:
-        if request.part_top_applicants['type'] not in PART_TOP_TYPES:
-            raise InvalidRequestParameter(
-                'Unknown part of top applications type:'
-                f' {request.part_top_applicants["type"]}')
-
-
-def check_filtering_params(data):
-    status = {'status': True, 'error': []}
-    keys = ['univ_title', 'area_title', 'univ_location', 'year',
-            'is_enrolled', 'part_top_applicants']
-    for key in keys:
-        if key == 'univs' or key == 'region' or key == 'knowledge_areas':
-            check_min_length_for_array(data, key, status['error'])
-            check_max_length_for_array(data, key, status['error'])
-        elif key == 'is_enrolled' and (not is_boolean(data[key])):
-            status['error'].append({key: ERRORS['check_boolean']})
-        elif key == 'part_top_applicants':
-            status['error'] += check_part_top_applicants(data[key])
-    return status
-
-
-def check_part_top_applicants(data):
-    error = []
-    keys = ['type', 'value']
-    for key in keys:
-        if key not in data:
-            error.append({key: ERRORS['field_missing']})
-        elif key == 'type' and data[key] in PART_TOP_TYPES:
-            error.append({key: ERRORS['unknown_value']})
-        elif key == 'value' and not between(0, data[key], 100):
-            error.append({key: ERRORS['unknown_value']})
-    return error
-
-
-def check_min_length_for_array(data, key, error):
-    is_valid_min_length = False not in [
-        check_minimum_length(s, LENGTHS[key][0]) for s in data[key]]
-    if not is_valid_min_length:
-        error.append({key: ERRORS['check_min_length']})
-
-
-def check_max_length_for_array(data, key, error):
-    is_valid_max_length = False not in [
-        check_maximum_length(s, LENGTHS[key][1]) for s in data[key]]
-    if not is_valid_max_length:
-        error.append({key: ERRORS['check_max_length']})
-
-
-def check_minimum_length(string, minimum):
-    """Validator function which checks if string is bigger than
-       minimum value.
-       :params: string - string to check
-                minimum - minimal length
-    """
-    return len(str(string)) >= minimum
-
+class String:
+    def __init__(self, min_length: int = 0, max_length: int = None):
+        self.min_length = min_length
+        self.max_length = max_length
 
-def check_maximum_length(string, maximum):
-    """Validator function which checks if string is bigger than
-       minimum value.
-       :params: string - string to check
-                minimum - minimal length
-    """
-    return len(str(string)) <= maximum
+    def compile(self):
+        min_length, max_length = self.min_length, self.max_length
+        type_error = ERRORS['check_type'].format('string')
 
+        def validate(value, path: str, errors: list):
+            if type(value) is not str:
+                errors.append({path: type_error})
+            elif len(value) < min_length:
+                errors.append({path: ERRORS['check_min_length']})
+            elif max_length is not None and len(value) > max_length:
+                errors.append({path: ERRORS['check_max_length']})
+        return validate
 
-def is_boolean(string):
-    return string == "true" or string == "false"
 
+class Number:
+    """
+    :param types: allowed types, bool is never a number
+    """
 
-def between(low: int, value, high: int):
-    return low <= int(value) <= high
+    def __init__(self, types: tuple = (int, float), minimum=None,
+                 maximum=None):
+        self.types = types
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def compile(self):
+        types, minimum, maximum = frozenset(self.types), self.minimum, \
+            self.maximum
+        type_error = ERRORS['check_type'].format(
+            ' or '.join(t.__name__ for t in self.types))
+        range_error = ERRORS['check_range'].format(minimum, maximum)
+
+        def validate(value, path: str, errors: list):
+            if type(value) not in types:
+                errors.append({path: type_error})
+            elif type(value) is float and not math.isfinite(value):
+                # NaN and Infinity are accepted by json module
+                errors.append({path: ERRORS['check_finite']})
+            elif (minimum is not None and value < minimum) or \
+                    (maximum is not None and value > maximum):
+                errors.append({path: range_error})
+        return validate
+
+
+class Boolean:
+    def compile(self):
+        type_error = ERRORS['check_type'].format('boolean')
+
+        def validate(value, path: str, errors: list):
+            if type(value) is not bool:
+                errors.append({path: type_error})
+        return validate
+
+
+class Choice:
+    def __init__(self, choices: list):
+        self.choices = choices
+
+    def compile(self):
+        # type is a part of key, True must not match 1
+        choices = frozenset((type(x), x) for x in self.choices)
+
+        def validate(value, path: str, errors: list):
+            try:
+                is_valid = (type(value), value) in choices
+            except TypeError:  # unhashable value
+                is_valid = False
+            if not is_valid:
+                errors.append({path: ERRORS['unknown_value']})
+        return validate
+
+
+class ListOf:
+    def __init__(self, item, max_items: int):
+        self.item = item
+        self.max_items = max_items
+
+    def compile(self):
+        validate_item, max_items = self.item.compile(), self.max_items
+        type_error = ERRORS['check_type'].format('list')
+        size_error = ERRORS['check_max_items'].format(max_items)
+
+        def validate(value, path: str, errors: list):
+            if type(value) is not list:
+                errors.append({path: type_error})
+            elif len(value) > max_items:
+                # items of hostile lists are not checked
+                errors.append({path: size_error})
+            else:
+                for i, item in enumerate(value):
+                    validate_item(item, f'{path}[{i}]', errors)
+        return validate
+
+
+class Object:
+    def __init__(self, fields: dict, required: tuple = ()):
+        self.fields = fields
+        self.required = required
+
+    def compile(self):
+        fields = {key: schema.compile()
+                  for key, schema in self.fields.items()}
+        required = self.required
+        type_error = ERRORS['check_type'].format('object')
+
+        def validate(value, path: str, errors: list):
+            if type(value) is not dict:
+                errors.append({path: type_error})
+                return
+            prefix = f'{path}.' if path else ''
+            for key, item in value.items():
+                validate_field = fields.get(key)
+                if validate_field is None:
+                    errors.append({f'{prefix}{key}': ERRORS['unknown_field']})
+                else:
+                    validate_field(item, f'{prefix}{key}', errors)
+            for key in required:
+                if key not in value:
+                    errors.append({f'{prefix}{key}': ERRORS['field_missing']})
+        return validate
+
+
+FILTER_SCHEMA = Object({
+    'univ_ids': ListOf(Number((int,), minimum=0), MAX_ITEMS['univ_ids']),
+    'univ_titles': ListOf(String(*LENGTHS['univs']),
+                          MAX_ITEMS['univ_titles']),
+    'knowledge_areas': ListOf(String(*LENGTHS['knowledge_areas']),
+                              MAX_ITEMS['knowledge_areas']),
+    'regions': ListOf(String(*LENGTHS['regions']), MAX_ITEMS['regions']),
+    'years': ListOf(Choice(YEARS), MAX_ITEMS['years']),
+    'enrolled_only': Boolean(),
+    'part_top_applicants': Object({
+        'type': Choice(PART_TOP_TYPES),
+        'value': Number(minimum=0, maximum=100)}, required=('value',))
+})
+
+FILTER_REQUEST_SCHEMA = Object({
+    'filter': FILTER_SCHEMA,
+    'sort_by': Choice(SORT_LABELS)
+}, required=('filter',))
+
+validate_filter_request = FILTER_REQUEST_SCHEMA.compile()
+
+
+def check_filter_request(request_json) -> FilterRequest:
+    """
+    :param request_json: decoded body of request
+    :raises ValidationError: with errors of all invalid fields
+    """
+    errors = []
+    validate_filter_request(request_json, '', errors)
+    if errors:
+        logger.warning(f'Invalid request: {errors}')
+        raise ValidationError(errors)
+    return FilterRequest(request_json)
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# log of tests is kept out of the repository
+LOG_FILE = os.path.join(tempfile.gettempdir(), 'ispyt_tests.log')
@@ -5,9 +5,10 @@ import requests
 
 from settings import APP_HOST, APP_PORT
 from src.logger import configure_logger
+from tests import LOG_FILE
 
 logger = logging.getLogger(__file__)
-logger = configure_logger(logger, 'tests.log')
+logger = configure_logger(logger, LOG_FILE)
 
 
 @pytest.mark.parametrize('request', [
@@ -27,3 +28,27 @@ def test_filter_data(request):
     data = response.json()
     logger.info(data)
     assert data, 'Failed to get the data'
+
+
+def test_get_filtering_params_not_modified():
+    response = requests.get(f'http://{APP_HOST}:{APP_PORT}/')
+    assert response.status_code == 200, 'Failed to get filtering params'
+    etag = response.headers['ETag']
+    response = requests.get(f'http://{APP_HOST}:{APP_PORT}/',
+                            headers={'If-None-Match': etag})
+    assert response.status_code == 304, 'Filtering params were sent again'
+
+
+def test_filter_data_with_equivalent_filters():
+    first = requests.post(f'http://{APP_HOST}:{APP_PORT}/', json={
+        'filter': {'regions': ['місто Київ'], 'years': [2017, 2016]}})
+    second = requests.post(f'http://{APP_HOST}:{APP_PORT}/', json={
+        'filter': {'years': [2016, 2017, 2017], 'regions': ['місто Київ']}})
+    assert first.json() == second.json(), 'Different results for same filter'
+
+
+def test_filter_data_with_unknown_university_titles():
+    response = requests.post(f'http://{APP_HOST}:{APP_PORT}/', json={
+        'filter': {'univ_titles': ['Unknown university']}})
+    assert response.status_code == 200
+    assert response.json() == [], 'Unknown universities selected data'
@@ -0,0 +1,116 @@
+import logging
+
+import pytest
+
+from src.cache import MemoryBackend, MetadataCache, ResultCache, \
+    SqliteBackend
+from src.logger import configure_logger
+from tests import LOG_FILE
+
+logger = logging.getLogger(__file__)
+logger = configure_logger(logger, LOG_FILE)
+
+
+class Generation(object):
+    """
+    Generation of data which is changed by tests instead of ingests.
+    """
+
+    def __init__(self):
+        self.value = 1
+
+    def __call__(self) -> int:
+        return self.value
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(10)
+    return SqliteBackend(str(tmp_path / 'cache.sqlite3'), 10)
+
+
+def test_backend_evicts_least_recently_used(backend):
+    backend.set('a', b'1234')
+    backend.set('b', b'1234')
+    assert backend.get('a') == b'1234', 'Value is not saved'
+    backend.set('c', b'1234')
+    assert backend.get('b') is None, 'Least recently used is not evicted'
+    assert backend.get('a') == b'1234' and backend.get('c') == b'1234', \
+        'Recently used value is evicted'
+    backend.set('d', b'0123456789a')
+    assert backend.get('d') is None, 'Value larger than cache is saved'
+    backend.clear()
+    assert backend.get('a') is None, 'Cache is not cleared'
+
+
+def test_memory_backend_size():
+    backend = MemoryBackend(10)
+    backend.set('a', b'1234')
+    backend.set('a', b'123456')
+    backend.set('b', b'1234')
+    assert backend.size == 10, 'Size of replaced value is counted twice'
+    backend.set('c', b'1')
+    assert list(backend.items) == ['b', 'c'] and backend.size == 5
+
+
+def test_result_cache_is_cleared_on_new_generation():
+    generation = Generation()
+    cache = ResultCache(MemoryBackend(100), generation, ttl=0)
+    value, first = cache.get('key')
+    assert value is None
+    cache.set('key', b'[]', first)
+    assert cache.get('key') == (b'[]', first), 'Result is not cached'
+    generation.value += 1
+    assert cache.get('key') == (None, generation.value), \
+        'Result of previous generation is returned'
+    assert not cache.backend.items, 'Backend is not cleared'
+    assert cache.get_stats() == {'hits': 1, 'misses': 2,
+                                 'hit_rate': 1 / 3}
+
+
+def test_result_of_previous_generation_is_dropped():
+    generation = Generation()
+    cache = ResultCache(MemoryBackend(100), generation, ttl=0)
+    _, old = cache.get('key')
+    chunks = cache.set_from_chunks('key', iter([b'[', b']']), old)
+    # ingest finishes while the response is streamed
+    generation.value += 1
+    assert b''.join(chunks) == b'[]', 'Chunks are changed'
+    assert cache.get('key') == (None, generation.value), \
+        'Stale result is saved under new generation'
+    assert not cache.backend.items, 'Stale result is saved'
+
+
+def test_set_from_chunks_skips_oversized_result():
+    cache = ResultCache(MemoryBackend(4), Generation(), ttl=0)
+    _, generation = cache.get('small')
+    assert b''.join(cache.set_from_chunks(
+        'small', iter([b'[1', b']']), generation)) == b'[1]'
+    assert b''.join(cache.set_from_chunks(
+        'large', iter([b'[1,', b'2]']), generation)) == b'[1,2]'
+    assert cache.get('small')[0] == b'[1]', 'Result is not cached'
+    assert cache.get('large')[0] is None, 'Oversized result is cached'
+
+
+def test_metadata_cache_etag_and_ttl():
+    generation = Generation()
+    bodies = []
+
+    def build_body() -> bytes:
+        bodies.append(f'{{"generation": {generation.value}}}'.encode())
+        return bodies[-1]
+
+    cache = MetadataCache(build_body, generation, ttl=3600)
+    body, etag = cache.get()
+    assert cache.get() == (body, etag) and len(bodies) == 1, \
+        'Body is rebuilt'
+    generation.value += 1
+    assert cache.get() == (body, etag), 'Generation is checked before ttl'
+    cache.ttl = 0
+    new_body, new_etag = cache.get()
+    logger.info(f'{etag} -> {new_etag}')
+    assert new_body == b'{"generation": 2}' and new_etag != etag, \
+        'Body of new generation is not built'
+    assert cache.get() == (new_body, new_etag) and len(bodies) == 2, \
+        'Body is rebuilt without new generation'
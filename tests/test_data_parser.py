@@ -0,0 +1,74 @@
+import logging
+import random
+
+import pytest
+
+from benchmarks.generator import generate_page_2014, generate_row_2014, \
+    generate_univ_page
+from data_parser import vstup2014
+from data_parser.directions import get_course
+from data_parser.htmlparser.htmlunivparser import get_area_course_info, \
+    get_univ_info_from_page_2017
+from data_parser.vstup2017 import clean_univ_title, extract_univ_file
+from src.logger import configure_logger
+from tests import LOG_FILE
+
+logger = logging.getLogger(__file__)
+logger = configure_logger(logger, LOG_FILE)
+
+# a table after the list which rows look like requests
+FOOTER_TABLE = ('<table><tbody>' + generate_row_2014(1, random.Random(0)) +
+                '</tbody></table>')
+
+
+@pytest.mark.parametrize('n_rows, footer', [
+    (0, ''),
+    (25, ''),
+    (25, FOOTER_TABLE)])
+def test_stream_file_2014(tmp_path, n_rows: int, footer: str):
+    page = generate_page_2014(n_rows, random.Random(n_rows))
+    page = page.replace('</body>', footer + '</body>')
+    path = tmp_path / 'i1p2.html'
+    path.write_text(page, encoding='utf-8')
+    expected = vstup2014.process_file(str(path))
+    actual = vstup2014.stream_file(str(path))
+    logger.info(f'{len(actual)} requests of {n_rows} rows')
+    assert len(actual) == n_rows, 'Rows of other tables are parsed'
+    assert [x.to_document() for x in actual] == \
+        [x.to_document() for x in expected], 'Streaming mode differs'
+
+
+@pytest.mark.parametrize('direction, course', [
+    ('6.030401 Правознавство', '081 Право'),
+    ('6.050101 Комп’ютерні науки', "122 Комп'ютерні науки"),
+    (' міжнародне право ', '293 Міжнародне право'),
+    ('6.040202 Механіка', None),
+    ('', None)])
+def test_get_course(direction: str, course: str):
+    assert get_course(direction) == course, 'Wrong course of direction'
+
+
+def test_process_file_2014_course(tmp_path):
+    path = tmp_path / 'i1p2.html'
+    path.write_text(generate_page_2014(5, random.Random(1)), encoding='utf-8')
+    courses = {x.course_id for x in vstup2014.process_file(str(path))}
+    assert len(courses) == 1 and None not in courses, \
+        'Direction is not mapped to course'
+    assert {x.course_id for x in vstup2014.stream_file(str(path))} == \
+        courses, 'Streaming mode differs'
+
+
+@pytest.mark.parametrize('univ_id', [1, 2, 3])
+def test_extract_univ_file(tmp_path, univ_id: int):
+    path = tmp_path / f'i{univ_id}.html'
+    path.write_text(generate_univ_page(univ_id, random.Random(univ_id)),
+                    encoding='utf-8')
+    page = path.read_bytes()
+    expected = get_univ_info_from_page_2017(page)
+    # extract_univ_file also cleans title and sets univ_id
+    expected['univ_title'] = clean_univ_title(expected['univ_title'])
+    expected['univ_id'] = univ_id
+    univ, area_courses = extract_univ_file(str(path))
+    assert univ == expected, 'University differs from BeautifulSoup'
+    assert area_courses == get_area_course_info(page), \
+        'Areas differ from BeautifulSoup'
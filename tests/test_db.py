@@ -1,13 +1,17 @@
 import logging
+from operator import itemgetter
 
 import pytest
 
+from db.cube import build_cube
 from db.db import DBPool
+from db.indexes import ensure_indexes, verify_indexes
 from src.logger import configure_logger
 from src.model import Filter
+from tests import LOG_FILE
 
 logger = logging.getLogger(__file__)
-logger = configure_logger(logger, 'tests.log')
+logger = configure_logger(logger, LOG_FILE)
 
 
 def test_get_regions(database: DBPool):
@@ -81,3 +85,115 @@ def test_get_knowledge_areas_by_universities(database: DBPool, title: str):
     knowledge_areas = database.get_knowledge_areas_by_university(title)
     logger.info(f'{title} ==> knowledge_areas {knowledge_areas}')
     assert knowledge_areas, 'Knowledge areas has not been found'
+
+
+@pytest.mark.parametrize('filter_data', [
+    {
+        'knowledge_areas': ['Право'],
+        'regions': ['місто Київ'],
+        'enrolled_only': True}])
+def test_get_analytics_by_filter(database: DBPool, filter_data: dict):
+    labels_fields = {
+        'average_overall_score': 'total_score',
+        'average_school_score': 'school_score'
+    }
+    result = list(database.get_analytics_by_filter(
+        Filter(filter_data), labels_fields))
+    logger.info(result)
+    assert result, 'Failed to get analytics'
+    univ_ids = [row['univ_id'] for row in result]
+    assert len(univ_ids) == len(set(univ_ids)), 'Universities are not unique'
+    scores = [row['average_overall_score'] for row in result]
+    assert scores == sorted(scores, reverse=True), 'Rows are not sorted'
+    assert all('_id' not in row and 'univ_title' in row for row in result)
+
+
+def test_get_analytics_by_unknown_university_titles(database: DBPool):
+    filter_request = Filter({'univ_titles': ['Unknown university']})
+    query = database._build_requests_query(filter_request)
+    assert query == {'univ_id': {'$in': []}}, 'Filter by titles is lost'
+    result = list(database.get_analytics_by_filter(
+        filter_request, {'average_overall_score': 'total_score'}))
+    assert not result, 'Unknown universities selected data'
+
+
+@pytest.mark.parametrize('filter_data', [
+    {
+        'knowledge_areas': ['Право'],
+        'part_top_applicants': {'type': 'overall', 'value': 20},
+        'years': [2017]}])
+def test_get_requests_by_filter_with_top_applicants(database: DBPool,
+                                                    filter_data: dict):
+    requests = database.get_requests_by_filter(Filter(filter_data))
+    assert requests, 'Failed to filter requests'
+    assert all(x['year'] == 2017 for x in requests), 'Wrong year'
+    assert all(x['top_overall'] < 20 for x in requests), \
+        'Requests out of top applicants'
+
+
+def test_verify_indexes(database: DBPool):
+    ensure_indexes(database.db)
+    report = verify_indexes(database.db)
+    logger.info(report)
+    assert report, 'Failed to verify indexes'
+
+
+@pytest.mark.parametrize('filter_data', [
+    {'knowledge_areas': ['Право'], 'enrolled_only': True},
+    {'regions': ['місто Київ'], 'years': [2017]}])
+def test_columnar_analytics(database: DBPool, filter_data: dict):
+    labels_fields = {'average_overall_score': 'total_score'}
+    expected = list(database.get_analytics_by_filter(
+        Filter(filter_data), labels_fields))
+    database.enable_analytics(refresh_interval=60)
+    try:
+        actual = list(database.get_analytics_by_filter(
+            Filter(filter_data), labels_fields))
+    finally:
+        database.analytics = None
+    key = itemgetter('univ_id')
+    expected, actual = sorted(expected, key=key), sorted(actual, key=key)
+    assert [x['count'] for x in expected] == [x['count'] for x in actual]
+    for x, y in zip(expected, actual):
+        assert x['average_overall_score'] == \
+            pytest.approx(y['average_overall_score'])
+        assert x['score_quantiles'] == y['score_quantiles']
+        assert sum(x['score_histogram']['counts']) == \
+            sum(count for _, count in x['score_digest'])
+
+
+def test_dimension_cache(database: DBPool):
+    region = 'місто Київ'
+    expected = sorted(univ['univ_id'] for univ in database.db.univs.find(
+        {'univ_location': region}))
+    assert sorted(database.get_university_ids_by_region(region)) == expected
+    database.dimensions.refresh()
+    assert sorted(database.get_university_ids_by_region(region)) == expected
+    univs = database.get_universities_by_ids(expected)
+    assert [univ['univ_id'] for univ in univs] == expected
+    stats = database.dimensions.get_stats()
+    logger.info(stats)
+    assert stats['univs']['hits'], 'Universities were not cached'
+
+
+@pytest.mark.parametrize('filter_data', [
+    {'knowledge_areas': ['Право'], 'enrolled_only': True},
+    {'regions': ['місто Київ'], 'years': [2017]}])
+def test_cube(database: DBPool, filter_data: dict):
+    labels_fields = {'average_overall_score': 'total_score'}
+    expected = list(database.get_analytics_by_filter(
+        Filter(filter_data), labels_fields))
+    build_cube(database.db)
+    database.enable_cube()
+    try:
+        actual = list(database.get_analytics_by_filter(
+            Filter(filter_data), labels_fields))
+    finally:
+        database.use_cube = False
+    key = itemgetter('univ_id')
+    expected, actual = sorted(expected, key=key), sorted(actual, key=key)
+    assert [x['count'] for x in expected] == [x['count'] for x in actual]
+    for x, y in zip(expected, actual):
+        assert x['average_overall_score'] == \
+            pytest.approx(y['average_overall_score'])
+        assert x['score_quantiles'] == y['score_quantiles']
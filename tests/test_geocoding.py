@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from data_parser import geocoding
+from data_parser.geocoding import Geocoder, resolve_offline
+from src.logger import configure_logger
+from tests import LOG_FILE
+
+logger = logging.getLogger(__file__)
+logger = configure_logger(logger, LOG_FILE)
+
+
+@pytest.mark.parametrize('address, region', [
+    ('01601, м. Київ, вул. Володимирська, 60', 'місто Київ'),
+    # region is matched before the city
+    ('08631, Київська обл., смт Глеваха, вул. Вокзальна, 40 км від м. Київ',
+     'Київська область'),
+    ('21021, Вінницька обл., Донецький національний університет '
+     '(переміщений з м. Донецьк)', 'Вінницька область'),
+    ('95007, АР Крим, м. Сімферополь', 'Автономна Республіка Крим'),
+    ('вул. Тестова, 1', '')])
+def test_resolve_offline(address: str, region: str):
+    assert resolve_offline(address) == region, 'Wrong region'
+
+
+@pytest.mark.parametrize('address, region', [
+    ('32300, м. Кам’янець-Подільський, вул. Огієнка, 61',
+     'Хмельницька область'),
+    ('84116, м. Слов`янськ, вул. Генерала Батюка, 19', 'Донецька область'),
+    ('м. Камʼянське, вул. Дніпробудівська, 2', 'Дніпропетровська область')])
+def test_resolve_offline_apostrophes(address: str, region: str):
+    assert resolve_offline(address) == region, \
+        'Apostrophes are not normalized'
+
+
+def test_cache_is_checked_before_network(tmp_path, monkeypatch):
+    requested = []
+
+    def resolve_online(address: str, api_key: str) -> str:
+        requested.append(address)
+        return 'Львівська область'
+
+    monkeypatch.setattr(geocoding, 'resolve_online', resolve_online)
+    cached, missing = 'вул. Кешована, 1', 'вул. Нова, 2'
+    geocoder = Geocoder(str(tmp_path / 'geocoding.sqlite3'), api_key='key')
+    try:
+        with geocoder.cache:
+            geocoder.cache.execute('INSERT INTO geocoding VALUES (?, ?)',
+                                   (cached, 'Одеська область'))
+        result = geocoder.resolve_many([cached, missing, 'м. Харків'])
+        logger.info(result)
+        assert requested == [missing], 'Network is used for known addresses'
+        assert result == {cached: 'Одеська область',
+                          missing: 'Львівська область',
+                          'м. Харків': 'Харківська область'}
+        # results of network are cached
+        assert geocoder.resolve_many([missing]) == {
+            missing: 'Львівська область'}
+        assert requested == [missing], 'Network result is not cached'
+    finally:
+        geocoder.close()
@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+
+from src.exceptions import ValidationError
+from src.logger import configure_logger
+from src.validator import check_filter_request, MAX_ITEMS
+from tests import LOG_FILE
+
+logger = logging.getLogger(__file__)
+logger = configure_logger(logger, LOG_FILE)
+
+
+@pytest.mark.parametrize('body', [
+    {'filter': {
+        'knowledge_areas': ['Право'],
+        'regions': ['місто Київ'],
+        'part_top_applicants': {'type': 'overall', 'value': 20},
+        'years': [2017],
+        'enrolled_only': True}},
+    {'filter': {'univ_ids': [1, 2], 'part_top_applicants': {'value': 5.5}},
+     'sort_by': 'average_school_score'},
+    {'filter': {}}
+])
+def test_valid_filter_request(body):
+    filter_request = check_filter_request(body)
+    assert filter_request.filter.years == body['filter'].get('years'), \
+        'Filter differs from request'
+
+
+@pytest.mark.parametrize('body, fields', [
+    (None, ['']),
+    ({}, ['filter']),
+    ({'filter': [], 'sort': 1}, ['filter', 'sort']),
+    ({'filter': {'years': [2017, '2016', 1999]}},
+     ['filter.years[1]', 'filter.years[2]']),
+    ({'filter': {'regions': ['К'], 'enrolled_only': 'true'}},
+     ['filter.regions[0]', 'filter.enrolled_only']),
+    ({'filter': {'univ_ids': [True, -1, 1.5]}},
+     ['filter.univ_ids[0]', 'filter.univ_ids[1]', 'filter.univ_ids[2]']),
+    ({'filter': {'part_top_applicants': {'type': 'best', 'value': 101}}},
+     ['filter.part_top_applicants.type',
+      'filter.part_top_applicants.value']),
+    ({'filter': {'part_top_applicants': {'value': float('nan')}}},
+     ['filter.part_top_applicants.value']),
+    ({'filter': {'part_top_applicants': {'value': float('-inf')}}},
+     ['filter.part_top_applicants.value']),
+    ({'filter': {'part_top_applicants': {'type': 'overall'}}},
+     ['filter.part_top_applicants.value']),
+    ({'filter': {'univ_ids': list(range(MAX_ITEMS['univ_ids'] + 1))}},
+     ['filter.univ_ids']),
+    ({'filter': {}, 'sort_by': 'rank'}, ['sort_by'])
+])
+def test_invalid_filter_request(body, fields):
+    with pytest.raises(ValidationError) as error:
+        check_filter_request(body)
+    logger.info(error.value.errors)
+    assert [field for e in error.value.errors for field in e] == fields, \
+        'Unexpected errors of fields'